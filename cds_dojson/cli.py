@@ -26,15 +26,29 @@
 
 from __future__ import absolute_import, print_function
 
+import bz2
+import gzip
 import json
+import lzma
 import os
 import sys
+import time
+from collections import Counter
 
 import click
 
+from .engine import Engine, iter_raw_records
+from .overdo import HAS_FLASK
 from .schemas.transform import compile_schema as _compile_schema
 from .utils import yaml2json
 
+COMPRESSIONS = (
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+)
+"""Magic number and opener of the supported compressed files."""
+
 
 @click.group()
 def cli():
@@ -61,3 +75,117 @@ def convert_yaml2json(source, destination):
     if sys.version_info[0] <= 3 and sys.version_info[1] < 6:
         click.echo('Use Python 3.6+ to deterministically generate the json.')
     yaml2json(source, destination)
+
+
+def open_source(path):
+    """Open a MARCXML file in binary mode, decompressing it if needed."""
+    with open(path, 'rb') as f:
+        magic = f.read(6)
+    for prefix, opener in COMPRESSIONS:
+        if magic.startswith(prefix):
+            return opener(path, 'rb')
+    return open(path, 'rb')
+
+
+def _iter_sources(paths):
+    """Yield the XML of the records of each file in turn."""
+    for path in paths:
+        with open_source(path) as source:
+            for marcxml in iter_raw_records(source):
+                yield marcxml
+
+
+def _quarantine_comment(result):
+    """Return the XML comment explaining why a record was quarantined."""
+    error = result.error.replace('--', '- -').rstrip('-')
+    return '<!-- record {0}: {1} -->\n'.format(result.position, error)
+
+
+@cli.command()
+@click.argument('sources', nargs=-1, required=True,
+                type=click.Path(exists=True, dir_okay=False))
+@click.option('-o', '--output', type=click.File('w'), default='-',
+              help='JSON lines file of the converted records.')
+@click.option('-w', '--workers', type=click.IntRange(min=0), default=None,
+              help='Number of worker processes, one per CPU by default, '
+                   '0 to convert in the current process.')
+@click.option('-c', '--chunk-size', type=click.IntRange(min=1), default=100,
+              show_default=True,
+              help='Number of records sent to a worker at once.')
+@click.option('-m', '--missing', type=click.File('w'), default=None,
+              help='JSON lines file of the keys not used by the conversion '
+                   'of each record.')
+@click.option('-q', '--quarantine', type=click.File('wb'), default=None,
+              help='MARCXML file collecting the records failing to convert.')
+@click.option('--correct', is_flag=True, default=False,
+              help='Validate the records against the MARC21 DTD, the invalid '
+                   'ones fail to convert.')
+@click.option('-a', '--app', 'app_factory', default=None,
+              help='module:attribute path of the Flask application factory '
+                   'used by the workers to resolve the schemas, required '
+                   'when Flask is installed.')
+def convert(sources, output, workers, chunk_size, missing, quarantine,
+            correct, app_factory):
+    """Convert MARCXML files, plain or compressed, to JSON lines.
+
+    The model of each record is matched with ``cds_marc21``. The throughput
+    and, at the end, the number of records of each model are written to the
+    standard error.
+    """
+    if HAS_FLASK and app_factory is None:
+        raise click.UsageError(
+            'Flask is installed, the URLs of the schemas need an application: '
+            'give its factory with -a/--app.')
+
+    engine = Engine(workers=workers, chunksize=chunk_size,
+                    track_access=missing is not None, correct=correct,
+                    app_factory=app_factory)
+
+    if quarantine:
+        quarantine.write(
+            b'<collection xmlns="http://www.loc.gov/MARC21/slim">\n')
+
+    models = Counter()
+    errors = 0
+    start = last = time.perf_counter()
+    with engine:
+        for result in engine.convert_records(_iter_sources(sources)):
+            if result.error is None:
+                models[result.model] += 1
+                output.write(json.dumps(result.json))
+                output.write('\n')
+                if missing is not None and result.missing:
+                    missing.write(json.dumps({
+                        'position': result.position,
+                        'recid': result.recid,
+                        'model': result.model,
+                        'missing': sorted(result.missing),
+                    }))
+                    missing.write('\n')
+            else:
+                errors += 1
+                if quarantine:
+                    quarantine.write(
+                        _quarantine_comment(result).encode('utf-8'))
+                    quarantine.write(result.marcxml)
+                    quarantine.write(b'\n')
+
+            now = time.perf_counter()
+            if now - last >= 1:
+                last = now
+                click.echo('\r{0} records, {1:.0f} records/s'.format(
+                    result.position + 1,
+                    (result.position + 1) / (now - start)),
+                    nl=False, err=True)
+
+    if quarantine:
+        quarantine.write(b'</collection>\n')
+
+    total = sum(models.values()) + errors
+    elapsed = time.perf_counter() - start
+    click.echo('\r{0} records in {1:.1f} s, {2:.0f} records/s'.format(
+        total, elapsed, total / elapsed if elapsed else 0), err=True)
+    for model, count in sorted(models.items()):
+        click.echo('{0:<30} {1:>10}'.format(model, count), err=True)
+    if errors:
+        click.echo('{0:<30} {1:>10}'.format('errors', errors), err=True)
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Document Server.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# Invenio is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Invenio; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""Parallel conversion of MARCXML dumps.
+
+The records of the dump are streamed, sent as XML bytes to a pool of worker
+processes in chunks and their conversions are given back in input order:
+
+.. code-block:: python
+
+    from cds_dojson.engine import Engine
+
+    with Engine(workers=8, app_factory='my_site.app:create_app') as engine:
+        for result in engine.convert('dump.xml'):
+            ...
+
+The models are built in the parent process before the workers are started.
+The workers are forked where possible, so they share them instead of
+building their own.
+"""
+
+import importlib
+import itertools
+import multiprocessing
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import etree
+
+from .marc21.utils import create_record, stream_records
+
+Result = namedtuple('Result', [
+    'position', 'recid', 'model', 'json', 'missing', 'error', 'marcxml'])
+"""Conversion of one record of the dump.
+
+``recid`` is the controlfield 001 of the record and ``model`` the entry point
+name of the matched model. ``json`` is ``None`` and ``error`` describes the
+exception when the conversion failed, e.g. when no single model matched.
+"""
+
+_worker = {}
+"""State of the current worker process."""
+
+
+def _import(path):
+    """Import an object from its ``module:attribute`` path."""
+    module, attribute = path.split(':', 1)
+    return getattr(importlib.import_module(module), attribute)
+
+
+def _init_worker(overdo, track_access, correct, app_factory):
+    """Load the models and push the application context of a worker."""
+    overdo = _import(overdo)
+    overdo.warmup()
+    if app_factory:
+        context = _import(app_factory)().app_context()
+        context.push()
+        _worker['context'] = context
+
+    _worker['overdo'] = overdo
+    _worker['track_access'] = track_access
+    _worker['correct'] = correct
+    _worker['names'] = {
+        id(model): name
+        for name, model in overdo.registry.models(overdo.entry_point_models)
+    }
+
+
+def _recid(blob):
+    """Return the controlfield 001 without marking it as accessed."""
+    value = dict.get(blob, '001')
+    if isinstance(value, tuple):
+        return value[0] if value else None
+    return value
+
+
+def _convert_chunk(chunk):
+    """Convert the XML of each record of the chunk.
+
+    :returns: the ``(recid, model, json, missing, error)`` tuple of each
+              record.
+    """
+    overdo = _worker['overdo']
+    track_access = _worker['track_access']
+    correct = _worker['correct']
+    names = _worker['names']
+
+    results = []
+    for marcxml in chunk:
+        recid = None
+        try:
+            blob = create_record(
+                marcxml, track_access=track_access, correct=correct)
+            recid = _recid(blob)
+            model = overdo.match(blob)
+            if id(model) not in names:
+                raise LookupError(
+                    'No single model matched record {0}'.format(recid))
+            model, json, missing = overdo.convert(blob, model=model)
+        except Exception as exc:
+            results.append((recid, None, None, None, '{0}: {1}'.format(
+                exc.__class__.__name__, exc)))
+        else:
+            results.append((recid, names[id(model)], json, missing, None))
+    return results
+
+
+def iter_raw_records(source):
+    """Yield the XML bytes of each ``<record>`` of a MARCXML stream."""
+    for element in stream_records(source):
+        yield etree.tostring(element)
+
+
+class Engine(object):
+    """Pool of worker processes converting MARCXML records.
+
+    :param workers: Number of worker processes, by default one per CPU. With
+                    ``0`` the records are converted in the current process.
+    :param chunksize: Number of records sent to a worker at once.
+    :param max_chunks: Number of chunks sent to the workers and not yet
+                       consumed, by default twice the number of workers. It
+                       bounds the memory used by the records in flight.
+    :param overdo: ``module:attribute`` path of the ``OverdoBase`` used to
+                   match the models.
+    :param track_access: Report the keys not used by the conversion, see
+                         :func:`cds_dojson.marc21.utils.create_record`.
+    :param correct: Validate the records against the MARC21 DTD, the invalid
+                    ones are given as errors.
+    :param app_factory: ``module:attribute`` path of a function returning the
+                        Flask application whose context is pushed in the
+                        workers, e.g. for the URLs of the schemas.
+    :param mp_context: ``multiprocessing`` context of the pool, ``fork``
+                       by default when available.
+    """
+
+    def __init__(self, workers=None, chunksize=100, max_chunks=None,
+                 overdo='cds_dojson.marc21:marc21', track_access=False,
+                 correct=False, app_factory=None, mp_context=None):
+        """Init."""
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunksize = chunksize
+        self.max_chunks = max_chunks or 2 * max(self.workers, 1)
+        self.initargs = (overdo, track_access, correct, app_factory)
+        if mp_context is None and \
+                'fork' in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context('fork')
+        self.mp_context = mp_context
+        self.pool = None
+        self.started = False
+
+    def start(self):
+        """Build the models and start the worker processes."""
+        if self.started:
+            return
+        if self.workers:
+            _import(self.initargs[0]).warmup()
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=self.mp_context,
+                initializer=_init_worker, initargs=self.initargs)
+        else:
+            _init_worker(*self.initargs)
+        self.started = True
+
+    def close(self):
+        """Stop the worker processes.
+
+        The chunks not started yet are cancelled. Without workers, pop the
+        application context pushed in the current process and forget its
+        state.
+        """
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        elif self.started:
+            context = _worker.get('context')
+            if context is not None:
+                context.pop()
+            _worker.clear()
+        self.started = False
+
+    def __enter__(self):
+        """Start the engine."""
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        """Stop the engine."""
+        self.close()
+
+    def _submit(self, chunk):
+        """Return a callable giving the results of the chunk."""
+        if self.pool is None:
+            results = _convert_chunk(chunk)
+            return lambda: results
+        return self.pool.submit(_convert_chunk, chunk).result
+
+    def convert_records(self, records):
+        """Yield the :class:`Result` of each record, in input order.
+
+        :param records: Iterable of the XML of the records, as ``bytes``.
+        """
+        self.start()
+
+        records = iter(records)
+        in_flight = deque()
+        position = 0
+
+        while True:
+            chunk = list(itertools.islice(records, self.chunksize))
+            if chunk:
+                in_flight.append((chunk, self._submit(chunk)))
+            if not in_flight:
+                return
+            if chunk and len(in_flight) < self.max_chunks:
+                continue
+
+            chunk, results = in_flight.popleft()
+            for marcxml, (recid, model, json, missing, error) in zip(
+                    chunk, results()):
+                yield Result(
+                    position, recid, model, json, missing, error, marcxml)
+                position += 1
+
+    def convert(self, source):
+        """Yield the :class:`Result` of each record of a MARCXML stream.
+
+        :param source: File name or file-like object.
+        """
+        return self.convert_records(iter_raw_records(source))
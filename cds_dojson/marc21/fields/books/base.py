@@ -26,8 +26,7 @@ import re
 import pycountry
 from dateutil import parser
 from dateutil.parser import ParserError
-from dojson.errors import IgnoreKey
-from dojson.utils import filter_values, flatten, for_each_value, force_list
+from dojson.utils import flatten, force_list
 
 from cds_dojson.marc21.fields.books.errors import MissingRequiredField, UnexpectedValue
 from cds_dojson.marc21.fields.books.utils import extract_volume_number
@@ -56,6 +55,7 @@ from cds_dojson.marc21.fields.utils import (
     replace_in_result,
 )
 from cds_dojson.marc21.models.books.base import model
+from cds_dojson.utils import SKIP, filter_values, for_each_value
 
 from .utils import extract_parts, is_excluded
 
@@ -107,13 +107,13 @@ def created(self, key, value):
                 self["source"] = source
                 year, month = int(sub_a[3:7]), int(sub_a[7:])
                 self['_created'] = datetime.date(year, month, 1).isoformat()
-                raise IgnoreKey('_created')
+                return SKIP
         except UnexpectedValue as e:
             e.subfield = 'a'
             self['internal_notes'] = internal_notes(self, key, value)
-            raise IgnoreKey('_created')
+            return SKIP
 
-    raise IgnoreKey('_created')
+    return SKIP
 
 
 @model.over('internal_notes', '^595__')
@@ -145,7 +145,7 @@ def collection(self, key, value):
             _migration['has_tags'] = True
         if not result_a and not result_b:
             self['document_type'] = document_type(self, key, value)
-            raise IgnoreKey('_migration')
+            return SKIP
     return _migration
 
 
@@ -225,7 +225,7 @@ def corporate_authors(self, key, value):
                                            'type': 'ORGANISATION'})
             else:
                 self['authors'] = collaborations(self, key, value)
-                raise IgnoreKey('corporate_authors')
+                return SKIP
         else:
             _corporate_authors.append({'full_name': clean_val('a', v, str),
                                        'type': 'ORGANISATION'})
@@ -489,18 +489,18 @@ def alternative_identifiers(self, key, value):
         if field_type and field_type.lower() == 'doi':
             # if 0247__2 == doi it is a DOI identifier
             self['identifiers'] = dois(self, key, value)
-            raise IgnoreKey('alternative_identifiers')
+            return SKIP
         elif field_type and field_type.upper() in \
                 EXTERNAL_SYSTEM_IDENTIFIERS_TO_IGNORE:
-            raise IgnoreKey('alternative_identifiers')
+            return SKIP
         else:
             raise UnexpectedValue(subfield='2')
     if key == '035__':
         if 'CERCER' in sub_a:
-            raise IgnoreKey('alternative_identifiers')
+            return SKIP
         sub_9 = clean_val('9', value, str, req=True)
         if 'CERCER' in sub_9:
-            raise IgnoreKey('alternative_identifiers')
+            return SKIP
         # conference_info.identifiers mixed data
         if sub_9.upper() == 'INSPIRE-CNUM':
             _conference_info = self.get('conference_info', {})
@@ -509,13 +509,13 @@ def alternative_identifiers(self, key, value):
                 {'scheme': 'INSPIRE_CNUM', 'value': sub_a})
             _conference_info.update({'identifiers': _prev_identifiers})
             self['conference_info'] = _conference_info
-            raise IgnoreKey('alternative_identifiers')
+            return SKIP
 
         elif sub_9.upper() in EXTERNAL_SYSTEM_IDENTIFIERS:
             indentifier_entry.update({'value': sub_a,
                                       'scheme': sub_9})
         elif sub_9.upper() in EXTERNAL_SYSTEM_IDENTIFIERS_TO_IGNORE:
-            raise IgnoreKey('external_system_identifiers')
+            return SKIP
         else:
             raise UnexpectedValue(subfield='9')
     if key == '036__':
@@ -569,7 +569,7 @@ def report_numbers(self, key, value):
 
         if sub_9 == 'arXiv':
             arxiv_eprints(self, key, value)
-            raise IgnoreKey('identifiers')
+            return SKIP
         else:
             get_value_rn(sub_a, sub_z, sub_9, entry)
         _identifiers.append(entry)
@@ -578,6 +578,7 @@ def report_numbers(self, key, value):
         entry = {}
         if 'n' in value or 'x' in value:
             barcodes(self, key, value)
+            return SKIP
 
         if all_empty and 'n' not in value and 'x' not in value:
             raise MissingRequiredField(subfield='9 or a or z or n or x')
@@ -603,7 +604,7 @@ def barcodes(self, key, value):
         ),
         barcode=val_x
     ))
-    raise IgnoreKey('barcodes')
+    return SKIP
 
 
 @model.over('subjects', '(^037__)')
@@ -643,7 +644,7 @@ def arxiv_eprints(self, key, value):
                 subject = {'scheme': 'arXiv', 'value': category}
                 _subjects.append(subject) if subject not in _subjects else None
                 self['subjects'] = _subjects
-        raise IgnoreKey('subjects')
+        return SKIP
 
 
 @model.over('languages', '^041__')
@@ -674,7 +675,7 @@ def subject_classification(self, key, value):
         sub_2 = clean_val('2', value, str)
         if sub_2 and sub_2.upper() in SUBJECT_CLASSIFICATION_EXCEPTIONS:
             keywords(self, key, value)
-            raise IgnoreKey('subjects')
+            return SKIP
         else:
             _subject_classification.update({'scheme': 'ICS'})
     elif key.startswith('050'):
@@ -682,7 +683,7 @@ def subject_classification(self, key, value):
     if _subject_classification not in prev_subjects:
         return _subject_classification
     else:
-        raise IgnoreKey('subjects')
+        return SKIP
 
 
 @model.over('keywords', '^6531_')
@@ -804,7 +805,7 @@ def book_series(self, key, value):
         'issn': val_x
     })
     _migration['has_serial'] = True
-    raise IgnoreKey('book_series')
+    return SKIP
 
 
 @model.over('note', '^500__')
@@ -832,7 +833,7 @@ def alternative_abstracts(self, key, value):
     if not abstract:
         # takes first abstract as main
         self["abstract"] = clean_val('a', value, str, req=True)
-        raise IgnoreKey('alternative_abstracts')
+        return SKIP
     new_abstract = clean_val('a', value, str, req=True)
     return new_abstract if new_abstract not in _alternative_abstracts else None
 
@@ -20,9 +20,6 @@
 
 from __future__ import absolute_import, print_function, unicode_literals
 
-from dojson.errors import IgnoreKey
-from dojson.utils import filter_values, for_each_value
-
 from cds_dojson.marc21.fields.books.errors import (
     ManualMigrationRequired,
     MissingRequiredField,
@@ -35,6 +32,7 @@ from cds_dojson.marc21.fields.books.utils import (
 )
 from cds_dojson.marc21.fields.utils import clean_val, filter_list_values, out_strip
 from cds_dojson.marc21.models.books.book import model
+from cds_dojson.utils import SKIP, filter_values, for_each_value
 
 from .base import alternative_titles as alternative_titles_base
 
@@ -65,7 +63,7 @@ def alternative_titles(self, key, value):
             _migration['is_multipart'] = True
             _migration['record_type'] = 'multipart'
             self['_migration'] = _migration
-            raise IgnoreKey('alternative_titles')
+            return SKIP
         else:
             if 'a' in value:
                 _alternative_titles.append({
@@ -85,7 +83,7 @@ def number_of_pages(self, key, value):
     """Translates number_of_pages fields."""
     val = clean_val('a', value, str)
     if is_excluded(val):
-        raise IgnoreKey('number_of_pages')
+        return SKIP
 
     parts = extract_parts(val)
     if parts['has_extra']:
@@ -20,8 +20,7 @@
 import re
 from copy import deepcopy
 
-from dojson.errors import IgnoreKey
-from dojson.utils import for_each_value, force_list
+from dojson.utils import force_list
 
 from cds_dojson.marc21.fields.books.errors import MissingRequiredField, UnexpectedValue
 from cds_dojson.marc21.fields.books.utils import (
@@ -36,6 +35,7 @@ from cds_dojson.marc21.fields.utils import (
     out_strip,
 )
 from cds_dojson.marc21.models.books.multipart import model
+from cds_dojson.utils import SKIP, for_each_value
 
 from .base import alternative_identifiers as alternative_identifiers_base
 from .base import urls as urls_base
@@ -75,7 +75,7 @@ def isbns(self, key, value):
                 'is_electronic': val_b is not None,
             }
             _insert_volume(_migration, volume_info['volume'], volume_obj)
-            raise IgnoreKey('identifiers')
+            return SKIP
         if set_search:
             self['physical_description'] = set_search.group(1).strip()
             isbn = {'scheme': 'ISBN', 'value': val_a}
@@ -90,7 +90,7 @@ def isbns(self, key, value):
                     'is_electronic': val_b is not None,
                 }
                 _insert_volume(_migration, volume_number, volume_obj)
-                raise IgnoreKey('identifiers')
+                return SKIP
             elif extract_volume_number(val_u, search=True):
                 raise UnexpectedValue(
                     subfield='u',
@@ -172,7 +172,7 @@ def barcode(self, key, value):
             identifiers = self.get('identifiers', [])
             identifiers.append(identifier)
             self['identifiers'] = identifiers
-            raise IgnoreKey('barcode')
+            return SKIP
 
         if val_n and val_x:
             volume_number = extract_volume_number(
@@ -187,7 +187,7 @@ def barcode(self, key, value):
         else:
             raise MissingRequiredField(subfield='x',
                                        message=' this record is missing a barcode number')
-    raise IgnoreKey('barcode')
+    return SKIP
 
 
 @model.over('authors', '(^100__)|(^700__)', override=True)
@@ -284,7 +284,7 @@ def number_of_volumes(self, key, value):
         _volumes = re.findall(r'\d+', val_a)
         if _volumes:
             return _volumes[0]
-    raise IgnoreKey('number_of_volumes')
+    return SKIP
 
 
 @model.over('multivolume_record_format', '^596__')
@@ -303,7 +303,7 @@ def multivolume_record_format(self, key, value):
             subfield='a', message=' unrecognized migration multipart tag'
         )
     _migration['multivolume_record_format'] = parsed
-    raise IgnoreKey('multivolume_record_format')
+    return SKIP
 
 
 @model.over('multipart_id', '^597__')
@@ -312,7 +312,7 @@ def multipart_id(self, key, value):
     val_a = clean_val('a', value, str)
     _migration = self['_migration']
     _migration['multipart_id'] = val_a
-    raise IgnoreKey('multipart_id')
+    return SKIP
 
 
 @model.over('urls', '^8564_', override=True)
@@ -338,6 +338,6 @@ def urls(self, key, value):
             'description': description,
         }
         _insert_volume(_migration, volume_info['volume'], volume_obj)
-        raise IgnoreKey('urls')
+        return SKIP
     else:
         return urls_base(self, key, value)
@@ -17,11 +17,10 @@
 # along with Invenio; if not, write to the Free Software Foundation, Inc.,
 # 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
 """Books fields."""
-from dojson.utils import for_each_value
-
 from cds_dojson.marc21.fields.books.multipart import isbns as multipart_identifiers
 from cds_dojson.marc21.fields.utils import clean_val, filter_list_values, out_strip
 from cds_dojson.marc21.models.books.serial import model
+from cds_dojson.utils import for_each_value
 
 
 @model.over('legacy_recid', '^001')
@@ -19,12 +19,11 @@
 """Standards fields."""
 from __future__ import unicode_literals
 
-from dojson.errors import IgnoreKey
-
 from cds_dojson.marc21.fields.books.errors import UnexpectedValue
 from cds_dojson.marc21.fields.books.utils import extract_parts, is_excluded
 from cds_dojson.marc21.fields.utils import clean_val, filter_list_values, out_strip
 from cds_dojson.marc21.models.books.standard import model
+from cds_dojson.utils import SKIP
 
 
 @model.over('alternative_titles', '^246__')
@@ -53,7 +52,7 @@ def number_of_pages(self, key, value):
     """Translates number_of_pages fields."""
     val = clean_val('a', value, str)
     if is_excluded(val):
-        raise IgnoreKey('number_of_pages')
+        return SKIP
 
     parts = extract_parts(val)
     if parts['has_extra']:
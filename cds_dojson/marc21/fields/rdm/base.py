@@ -19,11 +19,11 @@
 """Common RDM fields."""
 
 from dateutil import parser
-from dojson.errors import IgnoreKey
 
 from cds_dojson.marc21.fields.books.errors import ManualMigrationRequired
 from cds_dojson.marc21.fields.utils import clean_val, out_strip
 from cds_dojson.marc21.models.base import model
+from cds_dojson.utils import SKIP
 
 
 @model.over('preprint_date', '^269__')     # item, RDM?!
@@ -38,4 +38,4 @@ def preprint_date(self, key, value):
         except (ValueError, AttributeError):
             raise ManualMigrationRequired(subfield='c')
     else:
-        raise IgnoreKey('preprint_date')
+        return SKIP
@@ -27,7 +27,7 @@ from datetime import date, timedelta
 from itertools import chain
 
 import requests
-from dojson.errors import IgnoreKey
+from dojson.errors import IgnoreItem, IgnoreKey
 from dojson.utils import force_list
 from six import PY2, iteritems
 
@@ -36,7 +36,8 @@ from cds_dojson.marc21.fields.books.errors import (
     MissingRequiredField,
     UnexpectedValue,
 )
-from cds_dojson.utils import MementoDict
+from cds_dojson.pipeline import register_fuser, register_layer
+from cds_dojson.utils import SKIP, MementoDict
 
 
 # TODO to be decided where is the config value for domain
@@ -158,13 +159,17 @@ def replace_in_result(phrase, replace_with, key=None):
 
 
 def filter_list_values(f):
-    """Remove None and blank string values from list of dictionaries."""
+    """Remove None and blank string values from list of dictionaries.
+
+    Raises ``IgnoreKey`` when nothing is left, the rules registered on a
+    model return :data:`cds_dojson.utils.SKIP` instead, see
+    :func:`cds_dojson.pipeline.compile_rule`.
+    """
 
     @functools.wraps(f)
     def wrapper(self, key, value, **kwargs):
         out = f(self, key, value)
         if out:
-            print(out)
             clean_list = [dict((k, v) for k, v in elem.items()
                                if v) for elem in out if elem]
             clean_list = [elem for elem in clean_list if elem]
@@ -178,7 +183,12 @@ def filter_list_values(f):
 
 
 def out_strip(fn_decorated):
-    """Decorator cleaning output values of trailing and following spaces."""
+    """Decorator cleaning output values of trailing and following spaces.
+
+    Raises ``IgnoreKey`` for empty values, the rules registered on a model
+    return :data:`cds_dojson.utils.SKIP` instead, see
+    :func:`cds_dojson.pipeline.compile_rule`.
+    """
 
     def proxy(self, key, value, **kwargs):
         res = fn_decorated(self, key, value, **kwargs)
@@ -199,6 +209,106 @@ def out_strip(fn_decorated):
     return proxy
 
 
+register_layer('filter_list_values', filter_list_values)
+register_layer('out_strip', out_strip)
+
+
+@register_fuser('filter_list_values', None)
+def _filter_list(f):
+    """``filter_list_values`` returning ``SKIP`` instead of raising."""
+    def fused(self, key, value, **kwargs):
+        out = f(self, key, value)
+        if not out:
+            return SKIP
+        clean_list = [
+            elem for elem in (
+                {k: v for k, v in elem.items() if v} for elem in out if elem
+            ) if elem
+        ]
+        return clean_list or SKIP
+    return fused
+
+
+@register_fuser('out_strip', None)
+def _out_strip(f):
+    """``out_strip`` returning ``SKIP`` instead of raising."""
+    def fused(self, key, value, **kwargs):
+        res = f(self, key, value, **kwargs)
+        if not res:
+            return SKIP
+        if isinstance(res, str):
+            return res.strip()
+        if isinstance(res, list):
+            return [elem.strip() for elem in res if elem] or SKIP
+        return res
+    return fused
+
+
+def _each_out_strip(each_skips):
+    """Fuse ``for_each_value`` over ``out_strip``."""
+    def factory(f):
+        def fused(self, key, values, **kwargs):
+            parsed_values = []
+
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+
+            for value in values:
+                try:
+                    res = f(self, key, value, **kwargs)
+                except IgnoreItem:
+                    continue
+                if isinstance(res, list):
+                    res = [elem.strip() for elem in res if elem]
+                if not res:
+                    if each_skips:
+                        return SKIP
+                    raise IgnoreKey(key)
+                if isinstance(res, str):
+                    res = res.strip()
+                parsed_values.append(res)
+
+            return parsed_values
+        return fused
+    return factory
+
+
+def _filter_list_each(each_skips):
+    """Fuse ``filter_list_values`` over ``for_each_value``."""
+    def factory(f):
+        def fused(self, key, values, **kwargs):
+            parsed_values = []
+
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+
+            for value in values:
+                try:
+                    out = f(self, key, value)
+                except IgnoreItem:
+                    continue
+                if out is SKIP and each_skips:
+                    return out
+                parsed_values.append(out)
+
+            clean_list = [
+                elem for elem in (
+                    {k: v for k, v in elem.items() if v}
+                    for elem in parsed_values if elem
+                ) if elem
+            ]
+            return clean_list or SKIP
+        return fused
+    return factory
+
+
+for _each in ('for_each_value', 'dojson.for_each_value'):
+    register_fuser(_each, 'out_strip')(
+        _each_out_strip(each_skips=_each == 'for_each_value'))
+    register_fuser('filter_list_values', _each)(
+        _filter_list_each(each_skips=_each == 'for_each_value'))
+
+
 def _get_http_request(url, retry=0):
     """Get the url and retry if fails."""
     try:
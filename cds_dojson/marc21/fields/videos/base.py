@@ -19,9 +19,9 @@
 """Common videos fields."""
 from __future__ import absolute_import, print_function
 
-from dojson.errors import IgnoreKey
-from dojson.utils import filter_values, for_each_value, force_list, ignore_value
+from dojson.utils import filter_values, for_each_value, force_list
 
+from ....utils import SKIP
 from ...fields.utils import (
     build_contributor_from_508,
     build_contributor_videos,
@@ -130,7 +130,6 @@ def note(self, key, value):
 
 
 @model.over('translations', '(^246_[1_])|(590__)')
-@ignore_value
 def translations(self, key, value):
     """Translations."""
     translation = self.get('translations', [{}])[0]
@@ -140,7 +139,7 @@ def translations(self, key, value):
         translation['description'] = value.get('a')
     translation['language'] = 'fr'
     self['translations'] = [translation]
-    raise IgnoreKey('translations')
+    return SKIP
 
 
 @model.over('original_source', '^541__')
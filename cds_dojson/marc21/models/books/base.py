@@ -21,10 +21,6 @@ from __future__ import unicode_literals
 
 from copy import deepcopy
 
-from dojson._compat import iteritems
-from dojson.errors import IgnoreKey, MissingRule
-from dojson.utils import GroupableOrderedDict
-
 from ....overdo import OverdoJSONSchema
 from ..base import model as cds_base
 
@@ -178,52 +174,14 @@ class CDSOverdoBookBase(OverdoJSONSchema):
            ``exception_handlers`` allows to set custom handlers for
            non-standard MARC codes.
         """
-        handlers = {IgnoreKey: None}
-        handlers.update(exception_handlers or {})
-
-        def clean_missing(exc, output, key, value):
-            order = output.get('__order__')
-            if order:
-                order.remove(key)
-
-        if ignore_missing:
-            handlers.setdefault(MissingRule, clean_missing)
-
         output = {}
 
         if init_fields:
             output.update(**init_fields)
 
-        if self.index is None:
-            self.build()
-
-        if isinstance(blob, GroupableOrderedDict):
-            items = blob.iteritems(repeated=True, with_order=False)
-        else:
-            items = iteritems(blob)
-
-        for key, value in items:
-            try:
-                result = self.index.query(key)
-                if not result:
-                    raise MissingRule(key)
-
-                name, creator = result
-                data = creator(output, key, value)
-                if getattr(creator, '__extend__', False):
-                    existing = output.get(name, [])
-                    existing.extend(data)
-                    output[name] = existing
-                else:
-                    output[name] = data
-            except Exception as exc:
-                if exc.__class__ in handlers:
-                    handler = handlers[exc.__class__]
-                    if handler is not None:
-                        handler(exc, output, key, value)
-                else:
-                    raise
-        return output
+        return self._apply_rules(output, blob, ignore_missing=ignore_missing,
+                                 exception_handlers=exception_handlers,
+                                 with_order=False)
 
 
 class BooksBase(OverdoJSONSchema):
@@ -18,70 +18,234 @@
 # 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
 """Utilities for converting MARC21."""
 
-from dojson.contrib.marc21.utils import MARC21_DTD, split_stream
+import functools
+import logging
+import os
+from collections import OrderedDict
+
+from dojson.contrib.marc21.utils import split_stream
+from dojson.utils import GroupableOrderedDict
 from lxml import etree
 from six import StringIO, binary_type, text_type
 
-from ..utils import MementoDict
+from ..utils import LazyMementoDict, MementoDict
+
+logger = logging.getLogger(__name__)
+
+MARC21_DTD = os.path.join(os.path.dirname(__file__), 'data', 'MARC21slim.dtd')
+"""Path of the MARC21 slim DTD shipped with the package."""
+
+_dtds = {}
+"""Loaded DTDs, by path."""
+
+
+def marc21_dtd(path=None):
+    """Return the MARC21 DTD, loaded once per process.
+
+    :param path: Path of the DTD, by default :data:`MARC21_DTD`.
+    """
+    path = path or MARC21_DTD
+    try:
+        return _dtds[path]
+    except KeyError:
+        if not os.path.isfile(path):
+            raise IOError('MARC21 DTD not found: {0}'.format(path))
+        dtd = _dtds[path] = etree.DTD(path)
+        return dtd
+
+
+def _validate(tree, dtd):
+    """Validate each record of the tree against the DTD.
+
+    :raises lxml.etree.DocumentInvalid: for the first invalid record.
+    """
+    for record in tree.iter('{*}record'):
+        if not dtd.validate(record):
+            recid = record.findtext('{*}controlfield[@tag="001"]')
+            raise etree.DocumentInvalid(
+                'Record {0} is not valid: {1}'.format(
+                    recid or '(no 001)', dtd.error_log.last_error),
+                dtd.error_log)
 
 
-def create_record(marcxml, correct=False, keep_singletons=True):
+def _subfields(datafield, keep_singletons=True):
+    """Return the ``(code, text)`` pairs of the subfields of a datafield."""
+    fields = []
+    subfield_iterator = datafield.iter(tag='{*}subfield')
+    for subfield in subfield_iterator:
+        code = subfield.attrib.get('code', '!')  # .encode("UTF-8")
+        text = subfield.text or ''
+        if text or keep_singletons:
+            fields.append((code, text))
+    return fields
+
+
+def _group(new, fields):
+    """Fill an empty ``GroupableOrderedDict`` with ``(key, value)`` pairs.
+
+    Same as building it from the pairs, without copying again the nested
+    dictionaries which are instances of ``GroupableOrderedDict``.
+    """
+    grouped = {}
+    for key, value in fields:
+        grouped.setdefault(key, []).append(value)
+    OrderedDict.__delitem__(new, '__order__')
+    for key, values in grouped.items():
+        OrderedDict.__setitem__(new, key, tuple(values))
+    OrderedDict.__setitem__(
+        new, '__order__', tuple(key for key, _ in fields))
+    return new
+
+
+def _load_datafield(datafield, keep_singletons=True):
+    """Build the subfields of a datafield of a lazy record."""
+    return _group(MementoDict(()), _subfields(datafield, keep_singletons))
+
+
+def create_record(marcxml, correct=False, keep_singletons=True,
+                  track_access=True, lazy=False, keep_order=False):
     """Create a record object using the LXML parser.
 
-    If correct == 1, then perform DTD validation
+    The MARCXML is given as ``bytes``, parsed by lxml as is, as text, as a
+    file object or path, or as an already parsed element or tree.
+
+    If correct == 1, then validate each record against the MARC21 DTD
     If correct == 0, then do not perform DTD validation
-    """
-    if isinstance(marcxml, binary_type):
-        marcxml = marcxml.decode('utf-8')
+    If correct is an ``etree.DTD``, then validate against it instead
 
-    if isinstance(marcxml, text_type):
-        parser = etree.XMLParser(dtd_validation=correct, recover=True)
+    If track_access == True, build ``MementoDict`` which remember the keys
+    used by the conversion, as needed by ``missing()``
+    If track_access == False, build plain ``GroupableOrderedDict``, faster
+    when only ``do()`` is needed
 
-        if correct:
-            marcxml = (u'<?xml version="1.0" encoding="UTF-8"?>\n'
-                       u'<!DOCTYPE collection SYSTEM "file://{0}">\n'
-                       u'<collection>\n{1}\n</collection>'.format(
-                           MARC21_DTD, marcxml))
+    If lazy == True, build a ``LazyMementoDict`` keeping the datafield
+    elements, their subfields are only read when the field is first used.
+    Lazy records always track the accessed keys and keep the parsed tree
+    alive until every field is built. ``do`` never builds the fields without
+    a rule, which only pays off when there are many of them: on records
+    where most fields have a rule, building the fields one by one is slower
+    than building them all at once.
 
-        tree = etree.parse(StringIO(marcxml), parser)
+    The document is walked once. If keep_order == True, the fields keep the
+    order of the document, otherwise the leader comes first, then the
+    controlfields and the datafields
+    """
+    dict_class = MementoDict if track_access or lazy else GroupableOrderedDict
+
+    parser = etree.XMLParser(recover=True)
+
+    if isinstance(marcxml, (binary_type, text_type)):
+        if isinstance(marcxml, binary_type):
+            # Let lxml read the buffer and detect its encoding.
+            tree = etree.fromstring(marcxml, parser)
+        else:
+            tree = etree.parse(StringIO(marcxml), parser)
+    elif hasattr(marcxml, 'read') or isinstance(marcxml, os.PathLike):
+        tree = etree.parse(marcxml, parser)
     else:
         tree = marcxml
+
+    if correct and tree is not None:
+        _validate(tree, correct if isinstance(correct, etree.DTD)
+                  else marc21_dtd())
+
     record = []
+    pending = set()
+    if keep_order:
+        leaders = controlfields = datafields = record
+    else:
+        leaders, controlfields, datafields = [], [], []
 
-    leader_iterator = tree.iter(tag='{*}leader')
-    for leader in leader_iterator:
-        text = leader.text or ''
-        record.append(('leader', text))
+    field_iterator = () if tree is None else \
+        tree.iter('{*}leader', '{*}controlfield', '{*}datafield')
+    for field in field_iterator:
+        name = field.tag
+        name = name[name.rfind('}') + 1:]
 
-    controlfield_iterator = tree.iter(tag='{*}controlfield')
-    for controlfield in controlfield_iterator:
-        tag = controlfield.attrib.get('tag', '!')
-        text = controlfield.text or ''
-        if text or keep_singletons:
-            record.append((tag, text))
-
-    datafield_iterator = tree.iter(tag='{*}datafield')
-    for datafield in datafield_iterator:
-        tag = datafield.attrib.get('tag', '!')
-        ind1 = datafield.attrib.get('ind1', '!')
-        ind2 = datafield.attrib.get('ind2', '!')
-        if ind1 in ('', '#'):
-            ind1 = '_'
-        if ind2 in ('', '#'):
-            ind2 = '_'
-        ind1 = ind1.replace(' ', '_')
-        ind2 = ind2.replace(' ', '_')
-
-        fields = []
-        subfield_iterator = datafield.iter(tag='{*}subfield')
-        for subfield in subfield_iterator:
-            code = subfield.attrib.get('code', '!')  # .encode("UTF-8")
-            text = subfield.text or ''
-            if text or keep_singletons:
-                fields.append((code, text))
+        if name == 'datafield':
+            tag = field.attrib.get('tag', '!')
+            ind1 = field.attrib.get('ind1', '!')
+            ind2 = field.attrib.get('ind2', '!')
+            if ind1 in ('', '#'):
+                ind1 = '_'
+            if ind2 in ('', '#'):
+                ind2 = '_'
+            ind1 = ind1.replace(' ', '_')
+            ind2 = ind2.replace(' ', '_')
 
-        if fields or keep_singletons:
             key = '{0}{1}{2}'.format(tag, ind1, ind2)
-            record.append((key, MementoDict(fields)))
+            if lazy:
+                if keep_singletons or any(
+                        subfield.text
+                        for subfield in field.iter(tag='{*}subfield')):
+                    pending.add(key)
+                    datafields.append((key, field))
+                continue
+
+            fields = _subfields(field, keep_singletons)
+            if fields or keep_singletons:
+                datafields.append((key, _group(dict_class(()), fields)))
+
+        elif name == 'controlfield':
+            tag = field.attrib.get('tag', '!')
+            text = field.text or ''
+            if text or keep_singletons:
+                controlfields.append((tag, text))
+
+        else:
+            leaders.append(('leader', field.text or ''))
 
-    return MementoDict(record)
+    if not keep_order:
+        record = leaders + controlfields + datafields
+
+    if lazy:
+        return _group(LazyMementoDict((), pending, functools.partial(
+            _load_datafield, keep_singletons=keep_singletons)), record)
+    return _group(dict_class(()), record)
+
+
+def stream_records(source):
+    """Yield the ``<record>`` elements of a MARCXML stream, one at a time.
+
+    The stream is parsed incrementally and each element is cleared, together
+    with the already processed siblings, once the next one is requested, so
+    the memory used doesn't grow with the size of the input.
+
+    :param source: File name or file-like object, as ``etree.iterparse``.
+    """
+    context = etree.iterparse(
+        source, events=('end', ), tag='{*}record', huge_tree=True)
+    for _, element in context:
+        yield element
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+    del context
+
+
+def load(source, keep_singletons=True, track_access=True, correct=False,
+         on_invalid=None):
+    """Yield the records of a MARCXML stream, one at a time.
+
+    See :func:`stream_records`, the records are converted with
+    :func:`create_record`.
+
+    :param source: File name or file-like object, as ``etree.iterparse``.
+    :param correct: Validation of the records, as ``create_record``. The
+                    invalid records are skipped.
+    :param on_invalid: Function called with the ``etree.DocumentInvalid``
+                       error and the element of each invalid record, by
+                       default the error is logged as a warning.
+    """
+    for element in stream_records(source):
+        try:
+            record = create_record(
+                element, keep_singletons=keep_singletons,
+                track_access=track_access, correct=correct)
+        except etree.DocumentInvalid as exc:
+            if on_invalid is None:
+                logger.warning('%s', exc)
+            else:
+                on_invalid(exc, element)
+            continue
+        yield record
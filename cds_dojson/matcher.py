@@ -19,15 +19,58 @@
 
 """Query parser."""
 
+import functools
 import logging
+import re
+from collections import Counter, OrderedDict, deque, namedtuple
+from collections.abc import MutableMapping, Sequence
 
-import importlib_metadata
 import pypeg2
+import six
 from dojson.contrib.marc21 import model as default
+from invenio_query_parser.ast import (
+    AndOp,
+    DoubleQuotedValue,
+    EmptyQuery,
+    Keyword,
+    KeywordOp,
+    NotOp,
+    OrOp,
+    RangeOp,
+    RegexValue,
+    SingleQuotedValue,
+    Value,
+    ValueQuery,
+)
 from invenio_query_parser.parser import Main as parser
-from invenio_query_parser.walkers.match_unit import MatchUnit
+from invenio_query_parser.visitor import make_visitor
+from invenio_query_parser.walkers.match_unit import MatchUnit, dottable_getitem
 from invenio_query_parser.walkers.pypeg_to_ast import PypegConverter
 
+from .snapshot import entry_points, restored_query
+from .utils import LazyMementoDict
+
+_REGEX_SPECIAL_CHARS = frozenset('.^$*+?{}[]\\|()')
+
+logger = logging.getLogger(__name__ + ".dojson_matcher")
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+@functools.lru_cache(maxsize=None)
+def parse_query(query):
+    """Parse query string using given grammar.
+
+    The resulting AST is only read by the walkers, so it is parsed once per
+    query string, or restored from a snapshot, and shared by every
+    :class:`Query` built from it.
+    """
+    restored = restored_query(query)
+    if restored is not None:
+        return restored
+    tree = pypeg2.parse(query, parser, whitespace="")
+    return tree.accept(PypegConverter())
+
 
 class Query(object):
     """Query object."""
@@ -38,51 +81,554 @@ class Query(object):
 
     @property
     def query(self):
-        """Parse query string using given grammar."""
-        tree = pypeg2.parse(self._query, parser, whitespace="")
-        return tree.accept(PypegConverter())
+        """Return the parsed query."""
+        return parse_query(self._query)
 
     def match(self, record, user_info=None):
         """Return True if record match the query."""
         return self.query.accept(MatchUnit(record))
 
 
-def matcher(record, entry_point_group):
+def _compile_value(p, m='a'):
+    """Compile a ``match_unit`` search value into a function over the data.
+
+    It mirrors ``invenio_query_parser.walkers.match_unit.match_unit`` but the
+    value is prepared only once: regular expressions are precompiled and
+    plain words are looked up with ``in`` instead of a regular expression.
+    """
+    if isinstance(p, tuple):
+        left, right = p
+
+        def test(data):
+            return (left <= data) and (data <= right)
+    elif m == 'e':
+        def test(data):
+            return six.text_type(data) == p
+    elif _REGEX_SPECIAL_CHARS.isdisjoint(p):
+        def test(data):
+            return p in six.text_type(data)
+    else:
+        search = re.compile(p).search
+
+        def test(data):
+            return search(six.text_type(data)) is not None
+
+    def match(data):
+        if data is None:
+            return p is None
+        if isinstance(data, six.string_types):
+            return test(data)
+        if isinstance(data, Sequence):
+            return any(match(field) for field in data)
+        if isinstance(data, MutableMapping):
+            return any(match(field) for field in data.values())
+        return test(data)
+
+    return match
+
+
+def _compile_keyword(keyword):
+    """Compile a keyword into a getter over the record."""
+    if '.' in keyword:
+        return lambda data: dottable_getitem(data, keyword)
+
+    def getitem(data):
+        if isinstance(data, MutableMapping):
+            return data.get(keyword)
+        return dottable_getitem(data, keyword)
+
+    return getitem
+
+
+class PredicateCompiler(object):
+    """Compile a query AST into a Python predicate over a record.
+
+    The predicates give the same answer as the ``MatchUnit`` walker, but
+    without walking the tree nor compiling the search values for every
+    record.
+    """
+
+    visitor = make_visitor()
+
+    # pylint: disable=W0613,E0102
+
+    @visitor(AndOp)
+    def visit(self, node, left, right):
+        """Compile ``AndOp`` node."""
+        return lambda data: left(data) and right(data)
+
+    @visitor(OrOp)
+    def visit(self, node, left, right):
+        """Compile ``OrOp`` node."""
+        return lambda data: left(data) or right(data)
+
+    @visitor(NotOp)
+    def visit(self, node, op):
+        """Compile ``NotOp`` node."""
+        return lambda data: not op(data)
+
+    @visitor(KeywordOp)
+    def visit(self, node, left, right):
+        """Compile ``KeywordOp`` node."""
+        match = _compile_value(**right)
+        return lambda data: match(left(data))
+
+    @visitor(ValueQuery)
+    def visit(self, node, op):
+        """Compile ``ValueQuery`` node."""
+        return _compile_value(**op)
+
+    @visitor(Keyword)
+    def visit(self, node):
+        """Compile ``Keyword`` node."""
+        return _compile_keyword(node.value)
+
+    @visitor(Value)
+    def visit(self, node):
+        """Compile ``Value`` node."""
+        return dict(p=node.value)
+
+    @visitor(SingleQuotedValue)
+    def visit(self, node):
+        """Compile ``SingleQuotedValue`` node."""
+        return dict(p=node.value, m='p')
+
+    @visitor(DoubleQuotedValue)
+    def visit(self, node):
+        """Compile ``DoubleQuotedValue`` node."""
+        return dict(p=node.value, m='e')
+
+    @visitor(RegexValue)
+    def visit(self, node):
+        """Compile ``RegexValue`` node."""
+        return dict(p=node.value, m='r')
+
+    @visitor(RangeOp)
+    def visit(self, node, left, right):
+        """Compile ``RangeOp`` node."""
+        return dict(p=(left['p'], right['p']))
+
+    @visitor(EmptyQuery)
+    def visit(self, node):
+        """Compile ``EmptyQuery`` node."""
+        return lambda data: True
+
+    # pylint: enable=W0613,E0102
+
+
+class KeywordsCollector(object):
+    """Collect the record tags a query AST looks at.
+
+    ``None`` stands for the whole record, i.e. a value query without keyword.
+    """
+
+    visitor = make_visitor()
+
+    # pylint: disable=W0613,E0102
+
+    @visitor(AndOp)
+    def visit(self, node, left, right):
+        """Collect ``AndOp`` node keywords."""
+        return left | right
+
+    @visitor(OrOp)
+    def visit(self, node, left, right):
+        """Collect ``OrOp`` node keywords."""
+        return left | right
+
+    @visitor(NotOp)
+    def visit(self, node, op):
+        """Collect ``NotOp`` node keywords."""
+        return op
+
+    @visitor(KeywordOp)
+    def visit(self, node, left, right):
+        """Collect ``KeywordOp`` node keywords."""
+        return left
+
+    @visitor(ValueQuery)
+    def visit(self, node, op):
+        """Collect ``ValueQuery`` node keywords."""
+        return frozenset([None])
+
+    @visitor(Keyword)
+    def visit(self, node):
+        """Collect ``Keyword`` node keywords."""
+        return frozenset([node.value])
+
+    @visitor(Value)
+    def visit(self, node):
+        """Collect ``Value`` node keywords."""
+
+    @visitor(SingleQuotedValue)
+    def visit(self, node):
+        """Collect ``SingleQuotedValue`` node keywords."""
+
+    @visitor(DoubleQuotedValue)
+    def visit(self, node):
+        """Collect ``DoubleQuotedValue`` node keywords."""
+
+    @visitor(RegexValue)
+    def visit(self, node):
+        """Collect ``RegexValue`` node keywords."""
+
+    @visitor(RangeOp)
+    def visit(self, node, left, right):
+        """Collect ``RangeOp`` node keywords."""
+
+    @visitor(EmptyQuery)
+    def visit(self, node):
+        """Collect ``EmptyQuery`` node keywords."""
+        return frozenset()
+
+    # pylint: enable=W0613,E0102
+
+
+@functools.lru_cache(maxsize=None)
+def compile_query(query):
+    """Return a predicate telling if a record matches the query string."""
+    return parse_query(query).accept(PredicateCompiler())
+
+
+@functools.lru_cache(maxsize=None)
+def query_keywords(query):
+    """Return the keywords used by the query string."""
+    return parse_query(query).accept(KeywordsCollector())
+
+
+def clear_query_caches():
+    """Forget the parsed and compiled queries, e.g. to parse them again."""
+    parse_query.cache_clear()
+    compile_query.cache_clear()
+    query_keywords.cache_clear()
+
+
+def _fingerprint(value):
+    """Reduce a field value to what a compiled query can tell apart.
+
+    Query values are matched against any of the leaves of the field, so the
+    set of leaves is enough to know the result of every query on it.
+    """
+    if value is None:
+        return None
+    leaves = set()
+    stack = [value]
+    while stack:
+        data = stack.pop()
+        if isinstance(data, six.string_types):
+            leaves.add(data)
+        elif isinstance(data, Sequence):
+            stack.extend(data)
+        elif isinstance(data, MutableMapping):
+            stack.extend(data.values())
+        else:
+            leaves.add((data.__class__, data))
+    return frozenset(leaves)
+
+
+def _record_keyword(keyword):
+    """Tell if a query keyword can name a field of a MARC21 record.
+
+    Datafields are keyed with their indicators, e.g. ``980__``, so a bare
+    datafield tag, e.g. ``980`` in ``980:BOOK``, never has a value.
+    """
+    if keyword is None:
+        return False
+    tag = keyword.split('.', 1)[0]
+    return not (len(tag) == 3 and tag.isdigit() and tag >= '010')
+
+
+def _peek(record, key):
+    """Read a field without marking it as accessed."""
+    if not isinstance(record, dict):
+        return None
+    if isinstance(record, LazyMementoDict):
+        record.load(key)
+    value = dict.get(record, key)
+    if isinstance(value, tuple) and len(value) == 1:
+        return value[0]
+    return value
+
+
+class MatcherStats(object):
+    """Per model counters of the matcher decisions.
+
+    Records matching several models or none of them are counted as
+    ``ambiguous`` and ``unmatched`` and one out of ``sample_every`` of
+    them is summarized (record id and discriminating fields only) into the
+    last ``sample_size`` samples and the log.
+
+    The counters are kept per process: the workers of
+    :class:`cds_dojson.engine.Engine` each count their own records and
+    the counters are not gathered by the parent process.
+    """
+
+    def __init__(self, keywords=(), sample_every=100, sample_size=10):
+        """Init."""
+        self.keywords = tuple(keywords)
+        self.sample_every = sample_every
+        self.sample_size = sample_size
+        self.clear()
+
+    def clear(self):
+        """Reset the counters and the samples."""
+        self.models = Counter()
+        self.outcomes = Counter()
+        self.samples = {
+            'ambiguous': deque(maxlen=self.sample_size),
+            'unmatched': deque(maxlen=self.sample_size),
+        }
+
+    def count(self, outcome, name):
+        """Count a decision."""
+        self.outcomes[outcome] += 1
+        self.models[name] += 1
+
+    def sample(self, outcome, record):
+        """Return the summary of the record if it is sampled."""
+        if (self.outcomes[outcome] - 1) % self.sample_every:
+            return None
+        summary = {'recid': _peek(record, '001')}
+        for keyword in self.keywords:
+            summary[keyword] = _peek(record, keyword.split('.', 1)[0])
+        self.samples[outcome].append(summary)
+        return summary
+
+    def as_dict(self):
+        """Return the counters and the samples."""
+        return {
+            'models': dict(self.models),
+            'outcomes': dict(self.outcomes),
+            'samples': {
+                outcome: list(samples)
+                for outcome, samples in self.samples.items()
+            },
+        }
+
+
+class ModelGroup(object):
+    """Models of an entry point group together with their compiled queries.
+
+    An inverted index from record tags to models is built from the
+    queries, so that only the models looking at a tag present in the
+    record have to be evaluated.
+
+    The decisions are also kept in a LRU cache of ``cache_size`` entries,
+    keyed by a fingerprint of the fields used by the queries, and counted
+    in :attr:`stats`.
+    """
+
+    def __init__(self, models, cache_size=1024):
+        """Init."""
+        self.models = tuple(models)
+        self.predicates = tuple(
+            compile_query(model.__query__) for _, model in self.models
+        )
+
+        index = {}
+        always = []
+        keywords = set()
+        for position, (_, model) in enumerate(self.models):
+            model_keywords = query_keywords(model.__query__)
+            keywords.update(model_keywords)
+            if None in model_keywords or self.predicates[position]({}):
+                # The query can match a record without any of its tags.
+                always.append(position)
+                continue
+            for keyword in model_keywords:
+                index.setdefault(keyword.split('.', 1)[0], []).append(
+                    position)
+
+        self.index = {
+            keyword: tuple(positions)
+            for keyword, positions in index.items()
+        }
+        """Tag to the position of the models looking at it."""
+        self.always = tuple(always)
+        """Position of the models which have to be evaluated anyway."""
+
+        if None in keywords or any('.' in keyword for keyword in keywords):
+            # Whole record or nested lookups, the leaves are not enough.
+            cache_size = 0
+        self.fingerprint_getters = tuple(
+            _compile_keyword(keyword) for keyword in sorted(keywords)
+        )
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._hits = self._misses = 0
+
+        self.stats = MatcherStats(sorted(
+            keyword for keyword in keywords if _record_keyword(keyword)))
+
+    def candidates(self, record):
+        """Return the position of the models worth evaluating on the record."""
+        positions = set(self.always)
+        for keyword, models in self.index.items():
+            if keyword in record:
+                positions.update(models)
+        return sorted(positions)
+
+    def fingerprint(self, record):
+        """Return the cache key of the record."""
+        return tuple(
+            _fingerprint(getter(record)) for getter in self.fingerprint_getters
+        )
+
+    def evaluate(self, record):
+        """Return the ``(name, model)`` pairs whose query matches it."""
+        predicates = self.predicates
+        return tuple(
+            self.models[position]
+            for position in self.candidates(record)
+            if predicates[position](record)
+        )
+
+    def match(self, record):
+        """Return the matching ``(name, model)`` pairs using the cache."""
+        if not self.cache_size:
+            self._misses += 1
+            return self.evaluate(record)
+
+        try:
+            key = self.fingerprint(record)
+            matches = self._cache[key]
+        except TypeError:
+            # Unhashable leaves.
+            self._misses += 1
+            return self.evaluate(record)
+        except KeyError:
+            self._misses += 1
+            matches = self._cache[key] = self.evaluate(record)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return matches
+
+        self._hits += 1
+        self._cache.move_to_end(key)
+        return matches
+
+    def cache_info(self):
+        """Report the statistics of the decision cache."""
+        return CacheInfo(
+            self._hits, self._misses, self.cache_size, len(self._cache))
+
+    def cache_clear(self):
+        """Clear the decision cache and its statistics."""
+        self._cache.clear()
+        self._hits = self._misses = 0
+
+    def select(self, record):
+        """Return the model of the record, the default one if not unique."""
+        matches = self.match(record)
+        if len(matches) == 1:
+            name, model = matches[0]
+            self.stats.count('matched', name)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Model `%s` found matching the query %s.", name, model)
+            return model
+
+        if matches:
+            self.stats.count('ambiguous', None)
+            summary = self.stats.sample('ambiguous', record)
+            if summary is not None and logger.isEnabledFor(logging.ERROR):
+                logger.error(
+                    "Found more than one matches `%s`, we'll use %s"
+                    " for record %s.",
+                    [name for name, _ in matches], default, summary)
+        else:
+            self.stats.count('unmatched', None)
+            summary = self.stats.sample('unmatched', record)
+            if summary is not None and logger.isEnabledFor(logging.WARNING):
+                logger.warning(
+                    "Model *not* found, fallback to default %s for record %s",
+                    default, summary)
+        return default
+
+
+class ModelRegistry(object):
+    """Process-level registry of the DoJSON models of each entry point group.
+
+    Entry points are only scanned and loaded the first time a group is
+    requested, the loaded models are kept until :meth:`invalidate` is called.
+    Loading a group also parses and compiles the ``__query__`` of each of
+    its models.
+    """
+
+    def __init__(self, cache_size=1024):
+        """Init.
+
+        :param cache_size: Size of the decision cache of each group.
+        """
+        self.cache_size = cache_size
+        self._groups = {}
+
+    def group(self, entry_point_group):
+        """Return the :class:`ModelGroup` of the entry point group."""
+        try:
+            return self._groups[entry_point_group]
+        except KeyError:
+            group = ModelGroup(
+                [(entry_point.name, entry_point.load())
+                 for entry_point in sorted(
+                     entry_points(entry_point_group),
+                     key=lambda entry_point: entry_point.name)],
+                cache_size=self.cache_size
+            )
+            self._groups[entry_point_group] = group
+            return group
+
+    def models(self, entry_point_group):
+        """Return the ``(name, model)`` pairs registered in the group."""
+        return self.group(entry_point_group).models
+
+    def invalidate(self, entry_point_group=None):
+        """Forget the loaded models of one group or of all of them."""
+        if entry_point_group is None:
+            self._groups.clear()
+        else:
+            self._groups.pop(entry_point_group, None)
+
+    def stats(self):
+        """Return the matcher statistics of each loaded group."""
+        return {
+            entry_point_group: group.stats.as_dict()
+            for entry_point_group, group in self._groups.items()
+        }
+
+
+registry = ModelRegistry()
+"""Model registry shared by :func:`matcher` and ``OverdoBase``."""
+
+
+def matcher(record, entry_point_group, registry=registry):
     """Matcher for DoJSON models.
 
-    Using ``invenio-query-parser`` and ``MatchUnit`` walker decide which of the
-    DoJSON models will be use depending on the content of the record.
+    Using ``invenio-query-parser`` and the predicates compiled from the
+    queries decide which of the DoJSON models will be use depending on the
+    content of the record.
 
     :param record: Something that looks like a python dictionary
+    :param entry_point_group: Entry point group of the candidate models.
+    :param registry: :class:`ModelRegistry` used to load the models.
 
     :returns: a model instance
     """
-    logger = logging.getLogger(__name__ + ".dojson_matcher")
-
-    _matches = []
-    entrypoints = set(importlib_metadata.entry_points(group=entry_point_group))
-    for entry_point in entrypoints:
-        model = entry_point.load()
-        query = Query(model.__query__)
-        if query.match(record):
-            logger.info("Model `{0}` found matching the query {1}.".format(
-                entry_point.name, model
-            ))
-            _matches.append([entry_point.name, model])
-    try:
-        if len(_matches) > 1:
-            logger.error(
-                ("Found more than one matches `{0}`, we'll use {1}"
-                 " for record {2}.").format(
-                    _matches, default, record
-                )
-            )
-            return default
-        return _matches[0][1]
-    except IndexError:
-        logger.warning(
-            "Model *not* found, fallback to default {0} for record {1}".format(
-                default, record
-            )
-        )
-        return default
+    return registry.group(entry_point_group).select(record)
+
+
+def matcher_many(records, entry_point_group, registry=registry):
+    """Matcher for a stream of records.
+
+    The model group, with its compiled queries and decision cache, is
+    resolved once and shared by the whole stream.
+
+    :param records: Iterable of things that look like python dictionaries.
+    :param entry_point_group: Entry point group of the candidate models.
+    :param registry: :class:`ModelRegistry` used to load the models.
+
+    :returns: an iterator of ``(model, record)`` pairs in the input order.
+    """
+    select = registry.group(entry_point_group).select
+    for record in records:
+        yield select(record), record
@@ -18,11 +18,22 @@
 # 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
 """Base classes for CDS DoJSON."""
 
+import importlib
+import re
+import time
+from collections import OrderedDict, namedtuple
+
 import importlib_metadata
+from dojson._compat import iteritems
+from dojson.errors import IgnoreKey, MissingRule
 from dojson.overdo import Overdo as DoJSONOverdo
+from dojson.utils import GroupableOrderedDict
 
-from .matcher import matcher
-from .utils import not_accessed_keys
+from .matcher import matcher, matcher_many, registry
+from .pipeline import compile_rule
+from .profiler import RuleProfiler
+from .snapshot import entry_points, restored_rules
+from .utils import SKIP, LazyMementoDict, MementoDict, not_accessed_keys
 
 try:
     importlib_metadata.distribution('flask')
@@ -33,16 +44,109 @@ else:
     HAS_FLASK = True
 
 
+class Index(object):
+    """Rule index matching a key against all the rules at once.
+
+    The rule patterns are merged into a single alternation where each rule
+    is a capturing group, the first rule matching the key wins as with
+    ``dojson.overdo.Index``. A rule whose pattern is identical to an
+    earlier one can never win and is left out.
+
+    The result for each key, including the lack of rule, is kept in a
+    per-key dispatch table so the regular expression only runs the first
+    time a key is seen.
+    """
+
+    def __init__(self, rules=None, flags=0):
+        """Initialize index structures.
+
+        :param rules: list of tuples (regular expression, data)
+        :param flags: additional flags passed to SRE parser
+        """
+        self.rules = rules or []
+        self.flags = flags
+        self.dispatch = {}
+
+        alternatives = []
+        data_by_name = {}
+        seen = set()
+        for position, (regex, data) in enumerate(self.rules):
+            if regex in seen:
+                continue
+            seen.add(regex)
+            name = 'I{0}'.format(position)
+            alternatives.append('(?P<{0}>{1})'.format(name, regex))
+            data_by_name[name] = data
+
+        self._pattern = re.compile('|'.join(alternatives), flags=flags) \
+            if alternatives else None
+        # The group of the whole rule is the last one to close, so it is
+        # always the ``lastindex`` of a match.
+        self._data = {
+            self._pattern.groupindex[name]: data
+            for name, data in data_by_name.items()
+        } if alternatives else {}
+
+    def query(self, key):
+        """Return data matching the key."""
+        try:
+            return self.dispatch[key]
+        except KeyError:
+            match = self._pattern.match(key) if self._pattern else None
+            result = self.dispatch[key] = \
+                self._data[match.lastindex] if match else None
+            return result
+
+
+class ProfiledIndex(Index):
+    """Rule index recording the calls of the creators in a profiler."""
+
+    def __init__(self, rules=None, flags=0, profiler=None):
+        """Initialize index structures.
+
+        :param profiler: :class:`cds_dojson.profiler.RuleProfiler` receiving
+                         the statistics.
+        """
+        self.profiler = profiler
+        super(ProfiledIndex, self).__init__(rules, flags)
+        self._data = {
+            group: (name, profiler.wrap(name, creator))
+            for group, (name, creator) in self._data.items()
+        }
+
+    def query(self, key):
+        """Return data matching the key and count the keys without rule."""
+        result = super(ProfiledIndex, self).query(key)
+        if result is None:
+            self.profiler.missing(key)
+        return result
+
+
+WARMUP_MODULES = (
+    'arrow',
+    'dateutil.parser',
+    'pycountry',
+    'pypeg2',
+    'requests',
+)
+"""Heavy dependencies of the field rules imported by ``warmup()``."""
+
+Conversion = namedtuple('Conversion', ['model', 'json', 'missing'])
+"""Result of :meth:`OverdoBase.convert`."""
+
+
 class OverdoBase(DoJSONOverdo):
     """Base entry class."""
 
     def __init__(self,
                  bases=None,
                  entry_point_group=None,
-                 entry_point_models=None):
+                 entry_point_models=None,
+                 registry=registry):
         """Init."""
         super(OverdoBase, self).__init__(bases, entry_point_group)
         self.entry_point_models = entry_point_models
+        self.registry = registry
 
     def over(self, *args, **kwargs):
         """Not to be used in this class."""
@@ -50,11 +154,95 @@ class OverdoBase(DoJSONOverdo):
 
     def do(self, blob, **kwargs):
         """Translate blob values and instantiate new model instance."""
-        return matcher(blob, self.entry_point_models).do(blob, **kwargs)
+        return matcher(
+            blob, self.entry_point_models, registry=self.registry
+        ).do(blob, **kwargs)
 
     def missing(self, blob, **kwargs):
         """Translate blob values and instantiate new model instance."""
-        return matcher(blob, self.entry_point_models).missing(blob, **kwargs)
+        return matcher(
+            blob, self.entry_point_models, registry=self.registry
+        ).missing(blob, **kwargs)
+
+    def match_many(self, blobs):
+        """Return an iterator of ``(model, blob)`` pairs for the blobs.
+
+        Useful to dispatch a stream of records to model specific workers.
+        """
+        return matcher_many(
+            blobs, self.entry_point_models, registry=self.registry)
+
+    def match(self, blob):
+        """Return the model of the blob, the default one if not unique."""
+        return matcher(blob, self.entry_point_models, registry=self.registry)
+
+    def convert(self, blob, model=None, **kwargs):
+        """Translate blob values and report the keys left untouched.
+
+        The model is matched only once and used for both the translation
+        and the missing keys report.
+
+        :param model: Model of the blob, matched by default.
+        :returns: a :class:`Conversion` with the model, the JSON and the
+                  missing keys, ``None`` if the blob doesn't track the
+                  accessed keys.
+        """
+        if model is None:
+            model = self.match(blob)
+        json = model.do(blob, **kwargs)
+        missing = model.missing(blob) if isinstance(blob, MementoDict) \
+            else None
+        return Conversion(model, json, missing)
+
+    def warmup(self, modules=WARMUP_MODULES):
+        """Load and build every model ahead of the first record.
+
+        Calling it in a parent process before forking the workers lets them
+        share the loaded models, compiled queries and rule indexes instead
+        of each one building its own.
+
+        :param modules: Names of the modules to import beforehand, the ones
+                        which are not installed are skipped.
+        :returns: an ordered dictionary with the time, in seconds, taken by
+                  each phase.
+        """
+        timings = OrderedDict()
+
+        start = time.perf_counter()
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+        timings['imports'] = time.perf_counter() - start
+
+        # Loading the group parses and compiles the queries of the models.
+        start = time.perf_counter()
+        models = self.registry.models(self.entry_point_models)
+        timings['models'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _, model in models:
+            if model.index is None:
+                model.build()
+        timings['indexes'] = time.perf_counter() - start
+
+        return timings
+
+    def enable_profiling(self, profiler=None):
+        """Record the calls of the creators of every model in one profiler.
+
+        :returns: the :class:`cds_dojson.profiler.RuleProfiler`.
+        """
+        profiler = profiler or RuleProfiler()
+        for _, model in self.registry.models(self.entry_point_models):
+            model.enable_profiling(profiler)
+        return profiler
+
+    def disable_profiling(self):
+        """Stop recording the calls of the creators of every model."""
+        for _, model in self.registry.models(self.entry_point_models):
+            model.disable_profiling()
 
 
 class Overdo(DoJSONOverdo):
@@ -66,9 +254,16 @@ class Overdo(DoJSONOverdo):
     __ignore_keys__ = set()
     """List of keys which don't need transformation."""
 
+    profiler = None
+    """Profiler of the rules, see :meth:`enable_profiling`."""
+
     def over(self, name, *source_tags, **kwargs):
         """Register creator rule.
 
+        Known stacks of decorators of the creator are fused into a single
+        function in the rule, see :func:`cds_dojson.pipeline.compile_rule`.
+        The creator itself is returned untouched.
+
         :param kwargs:
             * override: boolean, overrides the rule if either the `name` or the
               regular expression in `source_tags` are equal to the current
@@ -84,8 +279,134 @@ class Overdo(DoJSONOverdo):
 
         if kwargs.get('override', False):
             self.rules[:] = [rule for rule in self.rules if not override(rule)]
+            self.index = None
+
+        register = super(Overdo, self).over(name, *source_tags)
+
+        def decorator(creator):
+            register(compile_rule(creator))
+            return creator
+        return decorator
+
+    def _collect_entry_points(self):
+        """Collect entry points."""
+        if self.entry_point_group is not None:
+            for entry_point in entry_points(self.entry_point_group):
+                entry_point.load()
+
+    def build(self):
+        """Build the rule index.
+
+        A new index, with an empty dispatch table, is built every time the
+        rules change. The first build uses the rules of the restored
+        snapshot, if any, instead of collecting the entry points.
+        """
+        rules = restored_rules(self)
+        if rules is None:
+            self._collect_entry_points()
+        else:
+            self.rules[:] = rules
+        if self.profiler is None:
+            self.index = Index(self.rules)
+        else:
+            self.index = ProfiledIndex(self.rules, profiler=self.profiler)
+
+    def enable_profiling(self, profiler=None):
+        """Record the calls of the creators of each rule.
+
+        :param profiler: :class:`cds_dojson.profiler.RuleProfiler` to use,
+                         a new one by default.
+        :returns: the profiler.
+        """
+        self.profiler = profiler or RuleProfiler()
+        self.index = None
+        return self.profiler
+
+    def disable_profiling(self):
+        """Stop recording the calls of the creators."""
+        self.profiler = None
+        self.index = None
+
+    def do(self, blob, ignore_missing=True, exception_handlers=None):
+        """Translate blob values and instantiate new model instance.
+
+        Same as ``dojson.overdo.Overdo.do``, except that the keys for which
+        the creator returns :data:`cds_dojson.utils.SKIP` are left out of
+        the output, as if ``IgnoreKey`` was raised.
+
+        :param blob: ``dict``-like object on which the matching rules are
+                     going to be applied.
+        :param ignore_missing: Set to ``False`` if you prefer to raise
+                               an exception ``MissingRule`` for the first
+                               key that it is not matching any rule.
+        :param exception_handlers: Give custom exception handlers to take care
+                                   of non-standard codes that are installation
+                                   specific.
+        """
+        return self._apply_rules({}, blob, ignore_missing=ignore_missing,
+                                 exception_handlers=exception_handlers)
+
+    def _iterrules(self, blob, with_order=True):
+        """Yield the ``(key, value, rule)`` of each item of the blob.
+
+        The fields of a :class:`cds_dojson.utils.LazyMementoDict` without a
+        rule are not built.
+        """
+        query = self.index.query
+        if isinstance(blob, LazyMementoDict):
+            return blob.iterrules(query, with_order=with_order)
+        if isinstance(blob, GroupableOrderedDict):
+            items = blob.iteritems(repeated=True, with_order=with_order)
+        else:
+            items = iteritems(blob)
+        return ((key, value, query(key)) for key, value in items)
+
+    def _apply_rules(self, output, blob, ignore_missing=True,
+                     exception_handlers=None, with_order=True):
+        """Apply the rules matching each item of the blob to the output.
+
+        The loop of ``dojson.overdo.Overdo.do``, shared by the models
+        overriding ``do``, which leaves the output untouched when the creator
+        returns :data:`cds_dojson.utils.SKIP`.
+        """
+        handlers = {IgnoreKey: None}
+        handlers.update(exception_handlers or {})
+
+        def clean_missing(exc, output, key, value):
+            order = output.get('__order__')
+            if order:
+                order.remove(key)
+
+        if ignore_missing:
+            handlers.setdefault(MissingRule, clean_missing)
+
+        if self.index is None:
+            self.build()
+
+        for key, value, result in self._iterrules(blob, with_order):
+            try:
+                if not result:
+                    raise MissingRule(key)
+
+                name, creator = result
+                data = creator(output, key, value)
+                if data is SKIP:
+                    continue
+                if getattr(creator, '__extend__', False):
+                    existing = output.get(name, [])
+                    existing.extend(data)
+                    output[name] = existing
+                else:
+                    output[name] = data
+            except Exception as exc:
+                if exc.__class__ in handlers:
+                    handler = handlers[exc.__class__]
+                    if handler is not None:
+                        handler(exc, output, key, value)
+                else:
+                    raise
 
-        return super(Overdo, self).over(name, *source_tags)
+        return output
 
     def missing(self, blob, **kwargs):
         """Return keys with missing rules."""
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Document Server.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# Invenio is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Invenio; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""Compiler of the decorator stacks of the rule creators.
+
+Stacks of known decorators, such as ``@for_each_value @filter_values``,
+are replaced when the rule is registered by a single function doing the
+work of both layers, which saves a call frame and the intermediate list
+for each value of the field.
+"""
+
+import functools
+
+from dojson import utils as dojson_utils
+from dojson.errors import IgnoreItem
+
+from . import utils
+from .utils import SKIP
+
+_layers = {}
+"""Kind and position of the wrapped function, by wrapper code object."""
+
+_fusers = {}
+"""Factory of the fused creator, by kinds of the two outer layers."""
+
+
+def register_layer(kind, decorator):
+    """Recognize the wrappers returned by the decorator as ``kind``."""
+    def sample(self, key, value):
+        """Sample creator."""
+
+    wrapper = decorator(sample)
+    cells = [cell.cell_contents for cell in wrapper.__closure__]
+    _layers[wrapper.__code__] = (kind, cells.index(sample))
+
+
+def register_fuser(outer, inner):
+    """Register the factory fusing the ``outer`` and ``inner`` layers.
+
+    The factory receives the function wrapped by the inner layer. With
+    ``inner`` set to ``None`` it replaces the outer layer alone, whatever it
+    wraps, when no fuser of both layers is known.
+    """
+    def decorator(factory):
+        _fusers[outer, inner] = factory
+        return factory
+    return decorator
+
+
+def unwrap(creator):
+    """Return the kind of the outer layer and the function it wraps."""
+    code = getattr(creator, '__code__', None)
+    try:
+        kind, position = _layers[code]
+    except KeyError:
+        return None, creator
+    return kind, creator.__closure__[position].cell_contents
+
+
+def compile_rule(creator):
+    """Return the creator with its two outer layers fused, if known.
+
+    The rules are only called by the do-loop of ``cds_dojson.overdo.Overdo``,
+    so the fused layers may return :data:`cds_dojson.utils.SKIP` where the
+    decorators raise ``IgnoreKey``.
+
+    The fused function keeps the attributes of the creator, e.g.
+    ``__extend__``, and references it as ``__creator__``.
+    """
+    outer, wrapped = unwrap(creator)
+    if outer is None:
+        return creator
+    inner, function = unwrap(wrapped)
+    factory = _fusers.get((outer, inner))
+    if factory is None:
+        factory, function = _fusers.get((outer, None)), wrapped
+    if factory is None:
+        return creator
+
+    fused = functools.update_wrapper(factory(function), creator)
+    fused.__creator__ = creator
+    return fused
+
+
+def original_creator(creator):
+    """Return the creator as registered, before being compiled."""
+    return getattr(creator, '__creator__', creator)
+
+
+register_layer('for_each_value', utils.for_each_value)
+register_layer('filter_values', utils.filter_values)
+register_layer('dojson.for_each_value', dojson_utils.for_each_value)
+register_layer('dojson.filter_values', dojson_utils.filter_values)
+
+
+def _each_filter_values(each_skips, filter_skips):
+    """Fuse ``for_each_value`` over ``filter_values``."""
+    def factory(f):
+        def fused(self, key, values, **kwargs):
+            parsed_values = []
+
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+
+            for value in values:
+                try:
+                    out = f(self, key, value, **kwargs)
+                except IgnoreItem:
+                    continue
+                if out is SKIP and filter_skips:
+                    if each_skips:
+                        return out
+                    parsed_values.append(out)
+                    continue
+                parsed_values.append(
+                    {k: v for k, v in out.items() if v is not None})
+
+            return parsed_values
+        return fused
+    return factory
+
+
+for _each in ('for_each_value', 'dojson.for_each_value'):
+    for _filter in ('filter_values', 'dojson.filter_values'):
+        register_fuser(_each, _filter)(_each_filter_values(
+            each_skips=_each == 'for_each_value',
+            filter_skips=_filter == 'filter_values',
+        ))
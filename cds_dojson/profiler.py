@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Document Server.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# Invenio is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Invenio; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""Per rule profiler of the conversions."""
+
+import functools
+import time
+from collections import Counter
+
+from .utils import SKIP
+
+MISSING_RULE = 'MissingRule'
+"""Name under which the keys without rule are counted."""
+
+IGNORE_KEY = 'IgnoreKey'
+"""Name under which the skipped keys are counted."""
+
+
+class RuleStats(object):
+    """Calls, wall time and exceptions of a rule for a key."""
+
+    __slots__ = ('calls', 'total', 'max', 'exceptions')
+
+    def __init__(self):
+        """Init."""
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.exceptions = Counter()
+
+    def as_dict(self):
+        """Return the statistics as a dictionary."""
+        return {
+            'calls': self.calls,
+            'total': self.total,
+            'max': self.max,
+            'exceptions': dict(self.exceptions),
+        }
+
+
+class RuleProfiler(object):
+    """Collect the statistics of the creators for each rule and key.
+
+    Exceptions are counted by class name, e.g. ``IgnoreKey``,
+    ``UnexpectedValue`` or ``ManualMigrationRequired``; the keys skipped
+    with :data:`cds_dojson.utils.SKIP` are counted as ``IgnoreKey`` too and
+    the keys without rule as a ``MissingRule`` of the ``None`` rule.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        """Init."""
+        self.clock = clock
+        self.rules = {}
+        """Statistics of each ``(rule name, key)`` pair."""
+
+    def stats(self, name, key):
+        """Return the statistics of the rule for the key."""
+        try:
+            return self.rules[name, key]
+        except KeyError:
+            stats = self.rules[name, key] = RuleStats()
+            return stats
+
+    def missing(self, key):
+        """Count a key without rule."""
+        stats = self.stats(None, key)
+        stats.calls += 1
+        stats.exceptions[MISSING_RULE] += 1
+
+    def wrap(self, name, creator):
+        """Return the creator recording its calls in the profiler."""
+        clock = self.clock
+
+        @functools.wraps(creator)
+        def profiled(output, key, value):
+            stats = self.stats(name, key)
+            start = clock()
+            try:
+                result = creator(output, key, value)
+                if result is SKIP:
+                    stats.exceptions[IGNORE_KEY] += 1
+                return result
+            except Exception as exc:
+                stats.exceptions[exc.__class__.__name__] += 1
+                raise
+            finally:
+                elapsed = clock() - start
+                stats.calls += 1
+                stats.total += elapsed
+                if elapsed > stats.max:
+                    stats.max = elapsed
+
+        return profiled
+
+    def clear(self):
+        """Forget the collected statistics."""
+        self.rules.clear()
+
+    def as_dict(self):
+        """Return the statistics keyed by ``(rule name, key)``."""
+        return {
+            rule: stats.as_dict() for rule, stats in self.rules.items()
+        }
+
+    def table(self, sort='total', limit=None):
+        """Return the statistics as a text table.
+
+        :param sort: Column to sort by in descending order, one of
+                     ``calls``, ``total`` or ``max``.
+        :param limit: Maximum number of rows.
+        """
+        rows = sorted(
+            self.rules.items(),
+            key=lambda item: getattr(item[1], sort),
+            reverse=True
+        )[:limit]
+        exceptions = sorted(set(
+            name for _, stats in rows for name in stats.exceptions))
+
+        header = ['rule', 'key', 'calls', 'total ms', 'max ms'] + exceptions
+        lines = [header]
+        for (name, key), stats in rows:
+            lines.append([
+                str(name), key, str(stats.calls),
+                '{0:.3f}'.format(stats.total * 1000),
+                '{0:.3f}'.format(stats.max * 1000),
+            ] + [str(stats.exceptions[exception]) for exception in exceptions])
+
+        widths = [max(len(line[column]) for line in lines)
+                  for column in range(len(header))]
+        return '\n'.join(
+            '  '.join(
+                cell.ljust(width) if column < 2 else cell.rjust(width)
+                for column, (cell, width) in enumerate(zip(line, widths))
+            ).rstrip()
+            for line in lines
+        )
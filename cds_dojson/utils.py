@@ -21,6 +21,8 @@
 import functools
 import json
 import os
+from collections import Counter, OrderedDict
+
 try:
     from collections import defaultdict
 except ImportError:
@@ -30,32 +32,76 @@ except ImportError:
 import arrow
 import six
 import yaml
+from dojson.errors import IgnoreItem
 from dojson.utils import GroupableOrderedDict
 
 
+class _Skip(object):
+    """Type of :data:`SKIP`."""
+
+    __slots__ = ()
+
+    def __bool__(self):
+        """Skipped keys have no value."""
+        return False
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        """Return the name of the singleton."""
+        return 'SKIP'
+
+    def __reduce__(self):
+        """Keep the singleton when copied or pickled."""
+        return 'SKIP'
+
+
+SKIP = _Skip()
+"""Value returned by a rule to skip the key.
+
+It is the exception-free equivalent of raising ``IgnoreKey``: the do-loop
+of ``cds_dojson.overdo.Overdo`` leaves the output untouched when a creator
+returns it. Only the SKIP-aware decorators of this module pass it through,
+those of ``dojson.utils`` would store it as a value.
+"""
+
+
 class MementoDict(GroupableOrderedDict):
-    """Dictionary that remembers which keys have being access."""
+    """Dictionary that remembers which keys have being access.
+
+    The accessed keys are kept in a set of the instance, so creating one no
+    longer writes to the class.
+    """
 
     def __new__(cls, *args):
         """Add the memory to the default instance."""
-        cls.accessed_keys = property(
-            lambda self: set([k for k in self.__memory if k != '__order__']))
-        cls.not_accessed_keys = property(
-            lambda self: set(
-                [k for k in self.keys() if k != '__order__']
-            ).difference(self.__memory))
         new = GroupableOrderedDict.__new__(cls, *args)
-        new.__memory = set()
-        new.__skip_memento = False
+        new._memory = set()
+        new._skip_memento = False
         return new
 
+    @property
+    def accessed_keys(self):
+        """Keys accessed so far."""
+        accessed = set(self._memory)
+        accessed.discard('__order__')
+        return accessed
+
+    @property
+    def not_accessed_keys(self):
+        """Keys not accessed so far."""
+        not_accessed = set(dict.keys(self))
+        not_accessed.difference_update(self._memory)
+        not_accessed.discard('__order__')
+        return not_accessed
+
     def iteritems(self, skip_memento=False, **kwargs):
         """Add to memory the keys while iterating if not skyp."""
-        self.__skip_memento = skip_memento
+        self._skip_memento = skip_memento
         for key, value in super(MementoDict, self).iteritems(**kwargs):
             self._add_to_memory(key)
             yield (key, value)
-        self.__skip_memento = False
+        self._skip_memento = False
 
     items = iteritems
 
@@ -68,8 +114,8 @@ class MementoDict(GroupableOrderedDict):
 
     def _add_to_memory(self, key):
         """Add key to the memory is it is not locked."""
-        if not self.__skip_memento:
-            self.__memory.add(key)
+        if not self._skip_memento:
+            self._memory.add(key)
 
     def __getitem__(self, key):
         """Add the key to memory before running the get."""
@@ -82,6 +128,98 @@ class MementoDict(GroupableOrderedDict):
         return super(MementoDict, self).get(key, default)
 
 
+class LazyMementoDict(MementoDict):
+    """``MementoDict`` building the values of some keys on first access.
+
+    The raw values of the ``pending`` keys are given to ``loader`` the first
+    time the key is read, the result replaces them. Order, grouping and
+    access tracking are the ones of ``MementoDict``.
+    """
+
+    def __new__(cls, values=None, pending=(), loader=None):
+        """Keep the pending keys and their loader."""
+        new = MementoDict.__new__(cls, values)
+        new._pending = set(pending)
+        new._loader = loader
+        return new
+
+    def load(self, *keys):
+        """Build the values of the keys, all the pending ones by default.
+
+        The keys are not marked as accessed.
+        """
+        pending = self._pending
+        if not pending:
+            return
+        for key in keys or list(pending):
+            if key in pending:
+                pending.discard(key)
+                OrderedDict.__setitem__(self, key, tuple(
+                    self._loader(value)
+                    for value in dict.__getitem__(self, key)))
+
+    def iteritems(self, skip_memento=False, with_order=True, repeated=False):
+        """Build the values while iterating, as ``MementoDict.iteritems``."""
+        if not repeated:
+            self.load()
+            for item in super(LazyMementoDict, self).iteritems(
+                    skip_memento=skip_memento, with_order=with_order):
+                yield item
+            return
+
+        self._skip_memento = skip_memento
+        order = dict.__getitem__(self, '__order__')
+        if with_order:
+            self._add_to_memory('__order__')
+            yield '__order__', order
+        pending = self._pending
+        occurrences = Counter()
+        for key in order:
+            if key in pending:
+                self.load(key)
+            self._add_to_memory(key)
+            yield key, dict.__getitem__(self, key)[occurrences[key]]
+            occurrences[key] += 1
+        self._skip_memento = False
+
+    items = iteritems
+
+    def iterrules(self, query, with_order=True):
+        """Yield the ``(key, value, query(key))`` of the repeated keys.
+
+        The pending values are only built when ``query`` returns a rule for
+        their key, the value is ``None`` otherwise. The keys are marked as
+        accessed, as by :meth:`iteritems`.
+        """
+        order = dict.__getitem__(self, '__order__')
+        if with_order:
+            self._add_to_memory('__order__')
+            yield '__order__', order, query('__order__')
+        pending = self._pending
+        occurrences = Counter()
+        for key in order:
+            rule = query(key)
+            self._add_to_memory(key)
+            if key in pending:
+                if not rule:
+                    yield key, None, rule
+                    continue
+                self.load(key)
+            yield key, dict.__getitem__(self, key)[occurrences[key]], rule
+            occurrences[key] += 1
+
+    def values(self, expand=False):
+        """Build all the values before listing them."""
+        self.load()
+        return super(LazyMementoDict, self).values(expand=expand)
+
+    def __getitem__(self, key):
+        """Build the value of the key before running the get."""
+        if key in self._pending:
+            self.load(key)
+        return super(LazyMementoDict, self).__getitem__(key)
+
+
 def for_each_squash(f):
     """In case of non repeatable field squash them into one.
 
@@ -110,26 +248,150 @@ def for_each_squash(f):
     return wrapper
 
 
+def for_each_value(f):
+    """Apply function to each item, as ``dojson.utils.for_each_value``.
+
+    The whole key is skipped as soon as one of the items returns
+    :data:`SKIP`.
+    """
+    setattr(f, '__extend__', True)
+
+    @functools.wraps(f)
+    def wrapper(self, key, values, **kwargs):
+        parsed_values = []
+
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+
+        for value in values:
+            try:
+                parsed_value = f(self, key, value, **kwargs)
+            except IgnoreItem:
+                continue
+            if parsed_value is SKIP:
+                return SKIP
+            parsed_values.append(parsed_value)
+
+        return parsed_values
+    return wrapper
+
+
+def filter_values(f):
+    """Remove None values from dictionary, as ``dojson.utils.filter_values``.
+
+    :data:`SKIP` is returned untouched.
+    """
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        out = f(*args, **kwargs)
+        if out is SKIP:
+            return SKIP
+        return dict((k, v) for k, v in six.iteritems(out) if v is not None)
+    return wrapper
+
+
+_CONTAINERS = (dict, tuple, list)
+
+
+def _expand(path, value):
+    """Split a value of the blob for :func:`iter_not_accessed_keys`.
+
+    :returns: the paths of the not accessed keys holding no container, and
+              the ``(path, value, accessed)`` tuples of the containers to
+              walk.
+    """
+    leaves = []
+    nested = []
+    if isinstance(value, dict):
+        if not isinstance(value, MementoDict):
+            raise TypeError(
+                'The accessed keys of a {0} are not tracked, create the '
+                'record with track_access=True to find the missing '
+                'keys.'.format(value.__class__.__name__))
+        if isinstance(value, LazyMementoDict):
+            value.load()
+        memory = value._memory
+        for key, items in dict.items(value):
+            if key == '__order__':
+                continue
+            for item in items:
+                if isinstance(item, _CONTAINERS):
+                    nested.append((path + (key, ), items, key in memory))
+                    break
+            else:
+                if key not in memory:
+                    leaves.append(path + (key, ))
+    else:
+        for item in value:
+            if isinstance(item, _CONTAINERS):
+                nested.append((path, item, True))
+    return leaves, nested
+
+
+def iter_not_accessed_keys(blob):
+    """Yield the path of each not accessed key of the blob.
+
+    The path is a tuple with the key of each level, e.g. ``('8564_', 'u')``
+    for a subfield or ``('001', )`` for a field. It is yielded once per
+    occurrence, the blob is walked once without recursion.
+
+    :raises TypeError: if a dictionary of the blob doesn't track the accessed
+                       keys, e.g. a record created with
+                       ``create_record(..., track_access=False)``.
+    """
+    if not isinstance(blob, _CONTAINERS):
+        return
+    leaves, nested = _expand((), blob)
+    for leaf in leaves:
+        yield leaf
+    emitted = len(leaves)
+    # The containers still to walk at each level, the path to report if
+    # nothing is found beneath them and the count of paths found before.
+    stack = [(iter(nested), None, emitted)]
+    while stack:
+        children, report, start = stack[-1]
+        for path, value, accessed in children:
+            leaves, nested = _expand(path, value)
+            for leaf in leaves:
+                yield leaf
+            stack.append(
+                (iter(nested), None if accessed else path, emitted))
+            emitted += len(leaves)
+            break
+        else:
+            stack.pop()
+            if report is not None and emitted == start:
+                emitted += 1
+                yield report
+
+
 def not_accessed_keys(blob):
     """Calculate not accessed keys from the blob.
 
-    It assumes the blob is an instance of MementoDict or a list.
+    It assumes the blob is an instance of MementoDict or a list. The keys
+    of each level are joined, e.g. ``8564_u``; a key is only reported
+    when nothing is missing beneath it.
+
+    :raises TypeError: if a dictionary of the blob doesn't track the accessed
+                       keys, e.g. a record created with
+                       ``create_record(..., track_access=False)``.
+    """
+    return set(''.join(path) for path in iter_not_accessed_keys(blob))
+
+
+def count_not_accessed_keys(blob, counter=None):
+    """Count the occurrences of the not accessed keys of the blob.
+
+    The keys are counted by path, see :func:`iter_not_accessed_keys`,
+    without building the joined strings.
+
+    :param counter: ``Counter`` to update, e.g. to aggregate many records.
+    :returns: the counter.
     """
-    missing = set()
-    if isinstance(blob, dict):
-        missing = blob.not_accessed_keys
-        for key, value in blob.iteritems(skip_memento=True):
-            partial_missing = not_accessed_keys(value)
-            if partial_missing:
-                missing.update(
-                    ['{0}{1}'.format(key, f) for f in partial_missing])
-                if key in missing:
-                    missing.remove(key)
-    elif isinstance(blob, (tuple, list)):
-        for value in blob:
-            missing.update(not_accessed_keys(value))
-
-    return missing
+    if counter is None:
+        counter = Counter()
+    counter.update(iter_not_accessed_keys(blob))
+    return counter
 
 
 def convert_date_to_iso_8601(date, format_='YYYY-MM-DD', **kwargs):
@@ -22,6 +22,8 @@ import os
 from itertools import chain
 
 import pkg_resources
+from flask import Flask
+from invenio_jsonschemas import InvenioJSONSchemas
 from jsonresolver import JSONResolver
 from jsonresolver.contrib.jsonschema import ref_resolver_factory
 from jsonschema import validate as _validate
@@ -54,6 +56,17 @@ def validate(json):
     )
 
 
+def create_app():
+    """Create the Flask application used to resolve the schemas."""
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        JSONSCHEMAS_HOST='cds.cern.ch',
+    )
+    InvenioJSONSchemas(app, entry_point_group="invenio_jsonschemas.testschemas")
+    return app
+
+
 def load_fixture_file(file_name):
     """Read the content of a file and return it."""
     return pkg_resources.resource_string(__name__,
@@ -22,10 +22,12 @@ import os
 
 import mock
 import pkg_resources
+from dojson.errors import IgnoreKey
 
 from cds_dojson.marc21.models.base import model
 from cds_dojson.marc21.utils import create_record
-from cds_dojson.overdo import Overdo
+from cds_dojson.overdo import Index, Overdo, ProfiledIndex
+from cds_dojson.utils import SKIP, for_each_value
 
 
 def test_base_model(app):
@@ -54,3 +56,112 @@ def test_overdo_missing():
         overdo = MyOverdo()
         overdo.__ignore_keys__ = set(['c'])
         assert overdo.missing('blob') == set(['a', 'b'])
+
+
+def test_overdo_dispatch_table():
+    """Test the per-key dispatch table of the rule index."""
+    overdo = Overdo()
+
+    @overdo.over('title', '^245__')
+    def title(self, key, value):
+        return value.get('a')
+
+    overdo.build()
+    with mock.patch.object(overdo.index, '_pattern') as pattern:
+        pattern.match.return_value.lastindex = 1
+        assert overdo.index.query('245__') == ('title', title)
+        assert overdo.index.query('245__') == ('title', title)
+        assert pattern.match.call_count == 1
+    overdo.index.dispatch.clear()
+
+    assert overdo.index.query('245__') == ('title', title)
+
+    assert overdo.index.query('999__') is None
+    assert overdo.index.dispatch == {'245__': ('title', title),
+                                     '999__': None}
+    assert overdo.do({'245__': {'a': 'Title'}}) == {'title': 'Title'}
+
+    @overdo.over('subtitle', '^245__', override=True)
+    def subtitle(self, key, value):
+        return value.get('b')
+
+    assert overdo.do({'245__': {'b': 'Subtitle'}}) == {'subtitle': 'Subtitle'}
+    assert overdo.index.dispatch == {'245__': ('subtitle', subtitle)}
+
+
+def test_overdo_skip():
+    """Test the keys skipped without exception."""
+    overdo = Overdo()
+
+    @overdo.over('title', '^245__')
+    def title(self, key, value):
+        return value.get('a') or SKIP
+
+    @overdo.over('authors', '^700__')
+    @for_each_value
+    def authors(self, key, value):
+        return value.get('a') or SKIP
+
+    assert overdo.do({'245__': {'b': 'Subtitle'}}) == {}
+    assert overdo.do({
+        '245__': {'a': 'Title'},
+        '700__': [{'a': 'Author'}, {'b': 'Affiliation'}],
+    }) == {'title': 'Title'}
+    assert overdo.do({'700__': {'a': 'Author'}}) == {'authors': ['Author']}
+
+
+def test_index():
+    """Test the merged regular expression of the rule index."""
+    index = Index([
+        ('(^100__)|(^700__)', 'authors'),
+        ('^(?P<tag>[17])00', 'contributors'),
+        ('^(037|088)__', 'report_numbers'),
+        ('(^100__)|(^700__)', 'shadowed'),
+        ('^7', 'sevens'),
+    ])
+
+    assert index.query('100__') == 'authors'
+    assert index.query('700__') == 'authors'
+    assert index.query('1001_') == 'contributors'
+    assert index.query('088__') == 'report_numbers'
+    assert index.query('710__') == 'sevens'
+    assert index.query('245__') is None
+    assert index._pattern.pattern.count('|') == 5
+
+    assert Index().query('245__') is None
+
+
+def test_overdo_profiling():
+    """Test the per rule profiler of Overdo."""
+    overdo = Overdo()
+
+    @overdo.over('title', '^245__')
+    def title(self, key, value):
+        if not value.get('a'):
+            raise IgnoreKey(key)
+        return value.get('a')
+
+    overdo.build()
+    assert type(overdo.index) is Index
+
+    profiler = overdo.enable_profiling()
+    assert overdo.do({'245__': {'a': 'Title'}}) == {'title': 'Title'}
+    assert overdo.do({'245__': {'b': 'Subtitle'}, '999__': {}}) == {}
+    assert type(overdo.index) is ProfiledIndex
+
+    stats = profiler.as_dict()
+    assert stats[('title', '245__')]['calls'] == 2
+    assert stats[('title', '245__')]['exceptions'] == {'IgnoreKey': 1}
+    assert stats[('title', '245__')]['max'] <= \
+        stats[('title', '245__')]['total']
+    assert stats[(None, '999__')]['exceptions'] == {'MissingRule': 1}
+
+    table = profiler.table().splitlines()
+    assert table[0].split() == ['rule', 'key', 'calls', 'total', 'ms', 'max',
+                                'ms', 'IgnoreKey', 'MissingRule']
+    assert len(table) == 3
+
+    overdo.disable_profiling()
+    assert overdo.do({'245__': {'a': 'Title'}}) == {'title': 'Title'}
+    assert type(overdo.index) is Index
+    assert profiler.as_dict()[('title', '245__')]['calls'] == 2
@@ -21,7 +21,17 @@
 
 from __future__ import absolute_import, print_function
 
+import io
+import pathlib
+
+import mock
 import pytest
+from click.testing import CliRunner
+from dojson.utils import GroupableOrderedDict
+from helpers import load_fixture_file, mock_contributor_fetch
+
+from cds_dojson.marc21.utils import create_record, load
+from cds_dojson.utils import MementoDict
 
 
 def test_version():
@@ -38,3 +48,233 @@ def test_wrong_model():
         def test(self, key, value):
             """Testing function."""
             return {'a': 'b'}
+
+
+def test_convert(app):
+    """Test matching, translating and reporting missing keys at once."""
+    from cds_dojson.marc21 import marc21
+    from cds_dojson.marc21.models.videos.project import model
+
+    with app.app_context(), mock.patch(
+        'cds_dojson.marc21.fields.utils.get_author_info_from_people_collection',
+        side_effect=mock_contributor_fetch,
+    ):
+        blob = create_record(load_fixture_file('videos_project.xml'))
+        expected_json = marc21.do(blob)
+        expected_missing = marc21.missing(blob)
+
+        blob = create_record(load_fixture_file('videos_project.xml'))
+        with mock.patch('cds_dojson.overdo.matcher',
+                        return_value=model) as matcher:
+            result = marc21.convert(blob)
+            assert matcher.call_count == 1
+
+        assert result.model == model
+        assert result.json == expected_json
+        assert result.missing == expected_missing
+
+
+def test_untracked_record(app):
+    """Test converting records created without access tracking."""
+    from cds_dojson.marc21 import marc21
+
+    with app.app_context(), mock.patch(
+        'cds_dojson.marc21.fields.utils.get_author_info_from_people_collection',
+        side_effect=mock_contributor_fetch,
+    ):
+        for fixture in ('videos_project.xml', 'videos_video.xml'):
+            xml = load_fixture_file(fixture)
+            blob = create_record(xml, track_access=False)
+            assert type(blob) is GroupableOrderedDict
+            assert marc21.do(blob) == marc21.do(create_record(xml))
+
+            result = marc21.convert(blob)
+            assert result.json == marc21.do(create_record(xml))
+            assert result.missing is None
+            with pytest.raises(TypeError) as excinfo:
+                marc21.missing(blob)
+            assert 'track_access=True' in str(excinfo.value)
+
+
+def test_create_record_order():
+    """Test the order of the fields of a record."""
+    marcxml = (
+        '<record>'
+        '<datafield tag="245" ind1=" " ind2=" ">'
+        '<subfield code="a">Title</subfield></datafield>'
+        '<controlfield tag="001">1</controlfield>'
+        '<datafield tag="020" ind1=" " ind2=" ">'
+        '<subfield code="a">ISBN</subfield></datafield>'
+        '<leader>00000nam</leader>'
+        '<datafield tag="245" ind1=" " ind2=" ">'
+        '<subfield code="b">Subtitle</subfield></datafield>'
+        '</record>'
+    )
+    blob = create_record(marcxml)
+    assert blob.keys(repeated=True) == \
+        ['leader', '001', '245__', '020__', '245__']
+    assert blob.keys() == ['leader', '001', '245__', '020__']
+    assert blob['245__'] == ({'a': 'Title'}, {'b': 'Subtitle'})
+
+    blob = create_record(marcxml, keep_order=True)
+    assert blob.keys(repeated=True) == \
+        ['245__', '001', '020__', 'leader', '245__']
+    assert blob.keys() == ['245__', '001', '020__', 'leader']
+
+
+def test_create_record_sources(tmpdir):
+    """Test creating records from bytes, text, files and paths."""
+    marcxml = load_fixture_file('videos_project.xml')
+    expected = repr(create_record(marcxml.decode('utf-8')))
+
+    path = tmpdir.join('record.xml')
+    path.write_binary(marcxml)
+    assert repr(create_record(marcxml)) == expected
+    assert repr(create_record(io.BytesIO(marcxml))) == expected
+    with open(str(path), 'rb') as f:
+        assert repr(create_record(f)) == expected
+    assert repr(create_record(pathlib.Path(str(path)))) == expected
+
+    blob = create_record(
+        u'<?xml version="1.0" encoding="ISO-8859-1"?>\n'
+        u'<record><controlfield tag="001">\xe9</controlfield></record>'
+        .encode('latin-1'))
+    assert blob['001'] == u'\xe9'
+    assert create_record(b'garbage') == {}
+
+
+def test_create_record_correct(tmpdir):
+    """Test validating the records against the DTD shipped."""
+    from lxml import etree
+
+    from cds_dojson.marc21.utils import MARC21_DTD, marc21_dtd
+
+    marcxml = load_fixture_file('videos_video.xml')
+    invalid = marcxml.replace(
+        b'<subfield code="a">', b'<unknown/><subfield code="a">', 1)
+
+    assert marc21_dtd() is marc21_dtd(MARC21_DTD)
+    assert create_record(marcxml, correct=True) == create_record(marcxml)
+    with pytest.raises(etree.DocumentInvalid) as excinfo:
+        create_record(invalid, correct=True)
+    assert 'Record 2272973' in str(excinfo.value)
+    assert 'unknown' in str(excinfo.value)
+
+    dtd = etree.DTD(MARC21_DTD)
+    assert create_record(invalid, correct=False)
+    with pytest.raises(etree.DocumentInvalid):
+        create_record(invalid, correct=dtd)
+
+    with pytest.raises(IOError) as excinfo:
+        marc21_dtd(str(tmpdir.join('missing.dtd')))
+    assert 'MARC21 DTD not found' in str(excinfo.value)
+
+
+def test_load_invalid():
+    """Test skipping and reporting the invalid records of a stream."""
+    records = [
+        load_fixture_file(fixture).split(b'<collection', 1)[1]
+        .split(b'>', 1)[1].rsplit(b'</collection>', 1)[0]
+        for fixture in ('videos_project.xml', 'videos_video.xml')
+    ]
+    invalid = records[1].replace(
+        b'<subfield code="a">', b'<unknown/><subfield code="a">', 1)
+    collection = (b'<collection xmlns="http://www.loc.gov/MARC21/slim">' +
+                  invalid + records[0] + invalid + records[1] +
+                  b'</collection>')
+
+    reports = []
+    blobs = list(load(
+        io.BytesIO(collection), correct=True,
+        on_invalid=lambda exc, element: reports.append((
+            str(exc), element.findtext('{*}controlfield[@tag="001"]')))))
+    assert [blob['001'] for blob in blobs] == ['2272969', '2272973']
+    assert len(reports) == 2
+    for error, recid in reports:
+        assert 'Record 2272973' in error
+        assert recid == '2272973'
+
+    with mock.patch('cds_dojson.marc21.utils.logger') as logger:
+        assert len(list(load(io.BytesIO(collection), correct=True))) == 2
+        assert logger.warning.call_count == 2
+
+
+def test_lazy_record(app):
+    """Test converting records building their fields on first access."""
+    from cds_dojson.marc21 import marc21
+
+    with app.app_context(), mock.patch(
+        'cds_dojson.marc21.fields.utils.get_author_info_from_people_collection',
+        side_effect=mock_contributor_fetch,
+    ):
+        for fixture in ('videos_project.xml', 'videos_video.xml'):
+            xml = load_fixture_file(fixture)
+            blob = create_record(xml, lazy=True)
+            assert blob._pending
+            assert blob.keys(repeated=True) == \
+                create_record(xml).keys(repeated=True)
+            assert blob['980__'] == create_record(xml)['980__']
+            assert '980__' not in blob._pending
+
+            assert repr(create_record(xml, lazy=True)) == \
+                repr(create_record(xml))
+            result = marc21.convert(create_record(xml, lazy=True))
+            expected = marc21.convert(create_record(xml))
+            assert result.json == expected.json
+            assert result.missing == expected.missing
+
+            # The fields without a rule are not built by ``do``.
+            blob = create_record(xml, lazy=True)
+            assert marc21.do(blob) == expected.json
+            assert blob._pending
+            assert not any(expected.model.index.query(key)
+                           for key in blob._pending)
+            assert marc21.missing(blob) == expected.missing
+
+
+def test_load(tmpdir):
+    """Test streaming the records of a MARCXML collection."""
+    from dojson.cli import cli
+
+    fixtures = ('videos_project.xml', 'videos_video.xml')
+    records = [
+        load_fixture_file(fixture).split(b'<collection', 1)[1]
+        .split(b'>', 1)[1].rsplit(b'</collection>', 1)[0]
+        for fixture in fixtures
+    ]
+    collection = (b'<collection xmlns="http://www.loc.gov/MARC21/slim">' +
+                  b''.join(records * 3) + b'</collection>')
+
+    blobs = list(load(io.BytesIO(collection)))
+    assert len(blobs) == 6
+    for blob, fixture in zip(blobs, fixtures * 3):
+        assert isinstance(blob, MementoDict)
+        assert blob == create_record(load_fixture_file(fixture))
+    blob = next(load(io.BytesIO(collection), track_access=False))
+    assert type(blob) is GroupableOrderedDict
+
+    source = tmpdir.join('collection.xml')
+    source.write_binary(collection)
+    result = CliRunner().invoke(cli, [
+        '-i', str(source), '-l', 'cds_marcxml', 'missing', 'cds_marc21'])
+    assert '245__a' in result.output
+
+
+def test_match_many():
+    """Test classifying records with ``marc21``."""
+    from cds_dojson.marc21 import marc21
+    from cds_dojson.marc21.models.videos.project import model
+
+    blob = create_record(load_fixture_file('videos_project.xml'))
+    assert list(marc21.match_many([blob])) == [(model, blob)]
+
+
+def test_warmup():
+    """Test building every model of ``marc21`` ahead of time."""
+    from cds_dojson.marc21 import marc21
+
+    timings = marc21.warmup(modules=('pypeg2', 'not_installed_module'))
+    assert list(timings) == ['imports', 'models', 'indexes']
+    assert all(timing >= 0 for timing in timings.values())
+    for _, model in marc21.registry.models(marc21.entry_point_models):
+        assert model.index is not None
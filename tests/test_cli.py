@@ -25,15 +25,19 @@
 
 from __future__ import absolute_import
 
+import gzip
 import json
 import os
 import shutil
 
+import mock
 import pkg_resources
 import pytest
 from click.testing import CliRunner
+from helpers import load_fixture_file, mock_contributor_fetch
 
-from cds_dojson.cli import compile_schema, convert_yaml2json
+from cds_dojson.cli import compile_schema, convert, convert_yaml2json
+from cds_dojson.marc21.utils import create_record
 
 
 @pytest.mark.parametrize('src, compiled', [
@@ -82,3 +86,70 @@ def test_cli_convert_yaml2json(source, destination):
         json_converted = json.load(s)
 
     assert json_mock == json_converted
+
+
+def test_cli_convert(tmpdir):
+    """Test cds-dojson CLI 'convert' command."""
+    plain = tmpdir.join('videos.xml')
+    plain.write_binary(load_fixture_file('videos_project.xml'))
+    compressed = tmpdir.join('videos.xml.gz')
+    with gzip.open(str(compressed), 'wb') as f:
+        f.write(load_fixture_file('videos_video.xml'))
+    unmatched = tmpdir.join('base.xml')
+    unmatched.write_binary(load_fixture_file('base.xml'))
+    output = tmpdir.join('records.jsonl')
+    missing = tmpdir.join('missing.jsonl')
+    quarantine = tmpdir.join('quarantine.xml')
+
+    with mock.patch(
+        'cds_dojson.marc21.fields.utils.get_author_info_from_people_collection',
+        side_effect=mock_contributor_fetch,
+    ):
+        result = CliRunner().invoke(convert, [
+            str(plain), str(unmatched), str(compressed),
+            '-w', '0', '-c', '1', '-o', str(output), '-m', str(missing),
+            '-q', str(quarantine), '--correct', '-a', 'helpers:create_app',
+        ])
+    assert 0 == result.exit_code
+
+    records = [json.loads(line) for line in output.readlines()]
+    assert [record['$schema'] for record in records] == [
+        {'$ref': 'https://cds.cern.ch/schemas/records/videos/project/'
+                 'project-v1.0.0.json'},
+        {'$ref': 'https://cds.cern.ch/schemas/records/videos/video/'
+                 'video-v1.0.0.json'},
+    ]
+    reports = [json.loads(line) for line in missing.readlines()]
+    assert [report['position'] for report in reports] == [2]
+    assert reports[0]['model'] == 'videos_video'
+    assert reports[0]['recid'] == '2272973'
+    assert reports[0]['missing']
+
+    quarantined = create_record(quarantine.read_binary())
+    assert quarantined == create_record(load_fixture_file('base.xml'))
+    assert 'record 1: LookupError: No single model matched record 1495143' \
+        in quarantine.read()
+
+    assert '3 records in' in result.output
+    assert 'videos_project' in result.output
+    assert 'errors' in result.output
+
+
+def test_cli_convert_options(tmpdir):
+    """Test the options rejected by cds-dojson CLI 'convert' command."""
+    source = tmpdir.join('videos.xml')
+    source.write_binary(load_fixture_file('videos_project.xml'))
+    output = tmpdir.join('records.jsonl')
+
+    result = CliRunner().invoke(convert, [str(source), '-o', str(output)])
+    assert 2 == result.exit_code
+    assert '-a/--app' in result.output
+    assert not output.check()
+
+    for option in (['-c', '0'], ['-w', '-1']):
+        result = CliRunner().invoke(convert, [
+            str(source), '-o', str(output), '-a', 'helpers:create_app',
+        ] + option)
+        assert 2 == result.exit_code
+        assert 'Invalid value' in result.output
+        assert not output.check()
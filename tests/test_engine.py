@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Document Server.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# Invenio is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Invenio; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""Test the parallel conversion engine."""
+
+import io
+import multiprocessing
+
+import mock
+import pytest
+from flask import has_app_context
+from helpers import load_fixture_file, mock_contributor_fetch
+
+from cds_dojson.engine import Engine, _worker, iter_raw_records
+from cds_dojson.marc21 import marc21
+from cds_dojson.marc21.utils import create_record
+
+FIXTURES = ('videos_project.xml', 'videos_video.xml')
+
+
+@pytest.fixture()
+def collection():
+    """MARCXML collection with the records of several fixtures."""
+    records = [
+        load_fixture_file(fixture).split(b'<collection', 1)[1]
+        .split(b'>', 1)[1].rsplit(b'</collection>', 1)[0]
+        for fixture in FIXTURES
+    ]
+    return (b'<collection xmlns="http://www.loc.gov/MARC21/slim">' +
+            b''.join(records * 5) + b'</collection>')
+
+
+@pytest.fixture()
+def fetch_contributor():
+    """Mock the contributor fetch, also in the forked workers."""
+    with mock.patch(
+        'cds_dojson.marc21.fields.utils.get_author_info_from_people_collection',
+        side_effect=mock_contributor_fetch,
+    ):
+        yield
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_engine(app, collection, fetch_contributor, workers):
+    """Test converting a collection in input order."""
+    with app.app_context():
+        expected = [
+            marc21.convert(create_record(marcxml))
+            for marcxml in iter_raw_records(io.BytesIO(collection))
+        ]
+
+    engine = Engine(
+        workers=workers, chunksize=2, max_chunks=2, track_access=True,
+        app_factory='helpers:create_app',
+        mp_context=multiprocessing.get_context('fork'))
+    with engine:
+        results = list(engine.convert(io.BytesIO(collection)))
+    assert engine.pool is None
+    assert not has_app_context()
+    assert not _worker
+
+    assert [result.position for result in results] == list(range(10))
+    names = {
+        id(model): name
+        for name, model in marc21.registry.models(marc21.entry_point_models)
+    }
+    for result, conversion in zip(results, expected):
+        assert result.error is None
+        assert result.model == names[id(conversion.model)]
+        assert result.json == conversion.json
+        assert result.missing == conversion.missing
+    assert [result.model for result in results[:2]] == \
+        ['videos_project', 'videos_video']
+    assert [result.recid for result in results[:2]] == \
+        ['2272969', '2272973']
+
+
+def test_engine_errors(collection):
+    """Test reporting the records failing to convert."""
+    with mock.patch('cds_dojson.engine.create_record',
+                    side_effect=ValueError('Broken record')):
+        with Engine(workers=0) as engine:
+            results = list(engine.convert(io.BytesIO(collection)))
+
+    assert len(results) == 10
+    for result in results:
+        assert result.json is None
+        assert result.error == 'ValueError: Broken record'
+        assert result.marcxml.startswith(b'<record')
+
+
+def test_engine_correct(collection, fetch_contributor):
+    """Test reporting the records not valid against the DTD as errors."""
+    collection = collection.replace(
+        b'<subfield code="a">', b'<unknown/><subfield code="a">', 1)
+    with Engine(workers=0, correct=True,
+                app_factory='helpers:create_app') as engine:
+        results = list(engine.convert(io.BytesIO(collection)))
+
+    assert len(results) == 10
+    assert results[0].json is None
+    assert results[0].error.startswith(
+        'DocumentInvalid: Record 2272969 is not valid')
+    assert all(result.error is None for result in results[1:])
+
+
+def test_engine_pool():
+    """Test forking the workers and cancelling the chunks left on close."""
+    engine = Engine(workers=2)
+    assert engine.mp_context.get_start_method() == 'fork'
+
+    with mock.patch('cds_dojson.engine.ProcessPoolExecutor') as pool:
+        with engine:
+            pass
+    assert pool.call_args[1]['mp_context'] is engine.mp_context
+    pool.return_value.shutdown.assert_called_once_with(cancel_futures=True)
+    assert engine.pool is None
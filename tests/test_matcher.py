@@ -16,12 +16,26 @@
 # You should have received a copy of the GNU General Public License
 # along with Invenio; if not, write to the Free Software Foundation, Inc.,
 # 59 Temple Place, Suite 330, Boston, MA 02D111-1307, USA.
+import importlib_metadata
+import mock
 import pytest
 from dojson.contrib import marc21 as default
+from helpers import load_fixture_file
 
 from cds_dojson.marc21.models.books import book, journal, multipart, serial, standard
 from cds_dojson.marc21.models.videos import project, video
-from cds_dojson.matcher import matcher
+from cds_dojson.marc21.utils import create_record
+from cds_dojson.matcher import (
+    ModelGroup,
+    ModelRegistry,
+    Query,
+    clear_query_caches,
+    compile_query,
+    matcher,
+    matcher_many,
+    parse_query,
+    query_keywords,
+)
 
 
 def test_marc21_matcher_videos():
@@ -93,3 +107,240 @@ def test_marc21_matcher_books():
                                     'cds_dojson.marc21.parent_models'
                                     )
     assert default.model == matcher(not_match, 'cds_dojson.marc21.models')
+
+
+def test_model_registry():
+    """Test that the model registry scans the entry points only once."""
+    registry = ModelRegistry()
+    blob = {'980__': [{'a': 'PUBLVIDEOMOVIE'}, {'b': 'VIDEOMEDIALAB'}]}
+
+    with mock.patch('cds_dojson.snapshot.importlib_metadata.entry_points',
+                    wraps=importlib_metadata.entry_points) as entry_points:
+        for _ in range(3):
+            assert video.model == matcher(blob, 'cds_dojson.marc21.models',
+                                          registry=registry)
+        assert entry_points.call_count == 1
+
+        registry.invalidate('cds_dojson.marc21.models')
+        assert video.model == matcher(blob, 'cds_dojson.marc21.models',
+                                      registry=registry)
+        assert entry_points.call_count == 2
+
+    names = [name for name, _ in registry.models('cds_dojson.marc21.models')]
+    assert names == sorted(names)
+    assert (project.model
+            in dict(registry.models('cds_dojson.marc21.models')).values())
+
+
+def test_parse_query_cache():
+    """Test that each query string is parsed only once."""
+    clear_query_caches()
+    registry = ModelRegistry()
+    models = registry.models('cds_dojson.marc21.parent_models')
+    hits = parse_query.cache_info().hits
+
+    for _, model in models:
+        assert Query(model.__query__).query is parse_query(model.__query__)
+    assert parse_query.cache_info().hits == hits + 2 * len(models)
+
+
+@pytest.mark.parametrize('blob', [
+    {'980__': [{'a': 'PUBLVIDEOMOVIE'}, {'b': 'VIDEOMEDIALAB'}]},
+    {'980__': [{'a': 'PUBLVIDEOMOVIE'}, {'c': 'DELETED'}],
+     '970__': {'a': 'AVW.project.1234'}},
+    {'970__': {'a': 'FCS.project.987'}},
+    {'690C_': [{'a': 'BOOK'}], '490__': {'a': 'Test title'}},
+    {'690C_': [{'a': 'BOOK'}], '490__': {'a': '   '}},
+    {'690C_': {'a': 'YELLOW REPORT'}},
+    {'690C_': {'a': 'YELLOW REPORTS'}},
+    {'690C_': [{'a': 'BOOK'}], '596__': [{'a': 'MULTIVOLUMES'}]},
+    {'697C_': [{'a': 'ENGLISH BOOK CLUB'}]},
+    {'980__': [{'a': 'PERI'}, {'a': 'MIGRATED'}]},
+    {'980__': {'a': 'STANDARD', 'b': 1}},
+    {'980__': 'PROCEEDINGS'},
+    {'980__': None},
+    {'foo': 'bar'},
+    {},
+])
+def test_compile_query(blob):
+    """Test that compiled queries agree with ``MatchUnit``."""
+    registry = ModelRegistry()
+    for group in ('cds_dojson.marc21.models',
+                  'cds_dojson.marc21.parent_models'):
+        for _, model in registry.models(group):
+            assert compile_query(model.__query__)(blob) == \
+                Query(model.__query__).match(blob)
+
+
+@pytest.mark.parametrize('fixture', [
+    'base.xml',
+    'videos_project.xml',
+    'videos_video.xml',
+    'books/books_book1.xml',
+    'books/books_book2.xml',
+])
+def test_compile_query_fixtures(fixture):
+    """Test that compiled queries agree with ``MatchUnit`` on fixtures."""
+    blob = create_record(load_fixture_file(fixture))
+    registry = ModelRegistry()
+    for group in ('cds_dojson.marc21.models',
+                  'cds_dojson.marc21.parent_models'):
+        for _, model in registry.models(group):
+            assert compile_query(model.__query__)(blob) == \
+                Query(model.__query__).match(blob)
+
+
+@pytest.mark.parametrize('query', [
+    '980__:/^VIDEO$/',
+    "980__:'VIDEO'",
+    '980__:1->3',
+    'VIDEO',
+    '',
+])
+def test_compile_query_values(query):
+    """Test the compilation of the other kinds of values."""
+    for blob in ({'980__': {'a': 'VIDEO'}}, {'980__': {'a': 'PUBLVIDEO'}},
+                 {'980__': [{'a': '2'}, {'b': '5'}]}, {'980__': '7'}, {}):
+        assert compile_query(query)(blob) == Query(query).match(blob)
+
+
+def test_query_keywords():
+    """Test the extraction of the tags used by a query."""
+    assert query_keywords(serial.model.__query__) == {
+        '690C_', '980__', '697C_', '490__'}
+    assert query_keywords(video.model.__query__) == {'980__', '970__'}
+    assert query_keywords('foo.bar:baz -980__:DELETED') == {
+        'foo.bar', '980__'}
+    assert query_keywords('VIDEO') == {None}
+
+
+def test_model_group_index():
+    """Test that only the models using tags of the record are evaluated."""
+    group = ModelGroup([
+        ('video', video.model),
+        ('project', project.model),
+        ('book', book.model),
+        ('everything', mock.Mock(__query__='-980__:DELETED')),
+    ])
+    assert group.index['970__'] == (0, 1)
+    assert group.always == (3, )
+
+    assert group.candidates({'foo': 'bar'}) == [3]
+    assert group.candidates({'970__': {'a': 'project'}}) == [0, 1, 3]
+    assert group.candidates({'690C_': {'a': 'BOOK'}}) == [2, 3]
+
+    with mock.patch.object(group, 'predicates',
+                           [mock.Mock(return_value=False)] * 4) as predicates:
+        assert group.match({'690C_': {'a': 'BOOK'}}) == ()
+        assert predicates[0].call_count == 2
+
+    registry = ModelRegistry()
+    predicates = [
+        mock.Mock(return_value=False)
+        for _ in registry.models('cds_dojson.marc21.models')
+    ]
+    with mock.patch.object(registry.group('cds_dojson.marc21.models'),
+                           'predicates', predicates):
+        assert default.model == matcher({'001': '1', '245__': {'a': 'T'}},
+                                        'cds_dojson.marc21.models',
+                                        registry=registry)
+    assert not any(predicate.called for predicate in predicates)
+
+
+def test_model_group_cache():
+    """Test the cache of the matcher decisions."""
+    group = ModelGroup([
+        ('video', video.model),
+        ('project', project.model),
+    ], cache_size=2)
+
+    video_blob = {'980__': [{'a': 'PUBLVIDEOMOVIE'}, {'b': 'VIDEOMEDIALAB'}],
+                  '245__': {'a': 'A title'}}
+    same_video_blob = {'980__': [{'b': 'VIDEOMEDIALAB'}, {'a': 'PUBLVIDEOMOVIE'}],
+                       '245__': {'a': 'Another title'}}
+    project_blob = {'970__': {'a': 'AVW.project.1234'}}
+
+    assert group.fingerprint(video_blob) == group.fingerprint(same_video_blob)
+    assert group.fingerprint(video_blob) != group.fingerprint(project_blob)
+
+    assert group.match(video_blob) == (('video', video.model), )
+    with mock.patch.object(group, 'evaluate') as evaluate:
+        assert group.match(same_video_blob) == (('video', video.model), )
+        assert not evaluate.called
+    assert group.match(project_blob) == (('project', project.model), )
+    assert group.match({}) == ()
+    assert group.cache_info() == (1, 3, 2, 2)
+
+    # The oldest decision was evicted.
+    assert group.match(video_blob) == (('video', video.model), )
+    assert group.cache_info().misses == 4
+
+    group.cache_clear()
+    assert group.cache_info() == (0, 0, 2, 0)
+
+    uncached = ModelGroup([('video', video.model)], cache_size=0)
+    assert uncached.match(video_blob) == (('video', video.model), )
+    assert uncached.cache_info() == (0, 1, 0, 0)
+
+    nested = ModelGroup([('nested', mock.Mock(__query__='980__.a:VIDEO'))])
+    assert nested.cache_size == 0
+
+
+def test_matcher_many():
+    """Test the classification of a stream of records."""
+    blobs = [
+        {'980__': [{'a': 'PUBLVIDEOMOVIE'}, {'b': 'VIDEOMEDIALAB'}]},
+        {'970__': {'a': 'FCS.project.987'}},
+        {'foo': 'bar'},
+        {'980__': [{'a': 'PUBLVIDEOMOVIE'}, {'b': 'VIDEOMEDIALAB'}]},
+        {'690C_': [{'a': 'BOOK'}]},
+    ]
+    registry = ModelRegistry()
+
+    results = list(matcher_many(iter(blobs), 'cds_dojson.marc21.models',
+                                registry=registry))
+
+    assert [blob for _, blob in results] == blobs
+    assert [model for model, _ in results] == [
+        video.model, project.model, default.model, video.model, book.model]
+    assert [model for model, _ in results] == [
+        matcher(blob, 'cds_dojson.marc21.models') for blob in blobs]
+    assert registry.group('cds_dojson.marc21.models').cache_info().hits == 1
+
+
+def test_matcher_stats(caplog):
+    """Test the matcher counters and the sampled diagnostics."""
+    class Record(dict):
+        def __repr__(self):
+            raise AssertionError('The full record should not be formatted.')
+
+    registry = ModelRegistry()
+    group = registry.group('cds_dojson.marc21.models')
+    group.stats.sample_every = 2
+
+    blobs = [
+        Record({'980__': {'a': 'PUBLVIDEOMOVIE'}}),
+        Record({'001': '1', 'foo': 'bar'}),
+        Record({'001': ('2', ), '690C_': {'a': 'BOOK'},
+                '980__': {'a': 'VIDEO'}}),
+        Record({'001': '3', 'foo': 'bar'}),
+        Record({'001': '4', 'foo': 'bar'}),
+    ]
+    with caplog.at_level('WARNING', logger='cds_dojson.matcher'):
+        models = [model for model, _ in matcher_many(
+            blobs, 'cds_dojson.marc21.models', registry=registry)]
+    assert models == [video.model] + [default.model] * 4
+
+    stats = registry.stats()['cds_dojson.marc21.models']
+    assert stats['models'] == {'videos_video': 1, None: 4}
+    assert stats['outcomes'] == {'matched': 1, 'ambiguous': 1, 'unmatched': 3}
+    assert [sample['recid'] for sample in stats['samples']['unmatched']] == [
+        '1', '4']
+    ambiguous, = stats['samples']['ambiguous']
+    assert ambiguous['recid'] == '2'
+    assert ambiguous['690C_'] == {'a': 'BOOK'}
+    assert set(ambiguous) == {'recid', '980__', '690C_', '697C_', '970__'}
+    assert len(caplog.records) == 3
+
+    group.stats.clear()
+    assert registry.stats()['cds_dojson.marc21.models']['outcomes'] == {}
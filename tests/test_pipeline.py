@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Document Server.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# Invenio is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Invenio; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""Rule compiler tests."""
+
+import pytest
+from dojson import utils as dojson_utils
+from dojson.errors import IgnoreItem, IgnoreKey
+
+from cds_dojson import utils
+from cds_dojson.marc21.fields.utils import filter_list_values, out_strip
+from cds_dojson.overdo import Overdo
+from cds_dojson.pipeline import compile_rule, original_creator
+from cds_dojson.utils import SKIP
+
+
+def creator(self, key, value, **kwargs):
+    """Return the subfields of the value, or one of the special values."""
+    if value.get('a') == 'item':
+        raise IgnoreItem()
+    if value.get('a') == 'skip':
+        return SKIP
+    if value.get('a') == 'string':
+        return ' string '
+    return dict(value, **kwargs)
+
+
+VALUES = [
+    {'a': 'foo', 'b': None, 'c': ''},
+    [{'a': 'foo'}, {'a': 'item'}, {'b': 'bar', 'c': None}],
+    [{'a': 'foo'}, {'a': 'skip'}, {'b': 'bar'}],
+    [{'a': 'item'}],
+    [],
+]
+
+
+def outcome(function, *args, **kwargs):
+    """Return the result or the class of the exception raised.
+
+    ``IgnoreKey`` is returned as ``SKIP``, the do-loop handles both alike.
+    """
+    try:
+        return function(*args, **kwargs)
+    except IgnoreKey:
+        return SKIP
+    except Exception as exc:
+        return exc.__class__
+
+
+@pytest.mark.parametrize('outer, inner', [
+    (utils.for_each_value, utils.filter_values),
+    (utils.for_each_value, dojson_utils.filter_values),
+    (dojson_utils.for_each_value, utils.filter_values),
+    (dojson_utils.for_each_value, dojson_utils.filter_values),
+    (utils.for_each_value, out_strip),
+    (dojson_utils.for_each_value, out_strip),
+    (filter_list_values, utils.for_each_value),
+    (filter_list_values, dojson_utils.for_each_value),
+])
+def test_compile_rule(outer, inner):
+    """Test that the fused creators behave as the decorator stacks."""
+    decorated = outer(inner(creator))
+    fused = compile_rule(decorated)
+
+    assert fused is not decorated
+    assert original_creator(fused) is decorated
+    assert getattr(fused, '__extend__', False) == \
+        getattr(decorated, '__extend__', False)
+    for value in VALUES:
+        assert outcome(fused, {}, 'key', value) == \
+            outcome(decorated, {}, 'key', value)
+    assert outcome(fused, {}, 'key', VALUES[0], d='e') == \
+        outcome(decorated, {}, 'key', VALUES[0], d='e')
+
+
+@pytest.mark.parametrize('decorator', [out_strip, filter_list_values])
+def test_compile_rule_layer(decorator):
+    """Test that single layers return SKIP instead of raising."""
+    decorated = decorator(creator)
+    fused = compile_rule(decorated)
+
+    assert fused is not decorated
+    assert original_creator(fused) is decorated
+    for value in ({}, {'a': 'skip'}, {'a': 'string'}, {'a': 'foo'}):
+        assert outcome(fused, {}, 'key', value) == \
+            outcome(decorated, {}, 'key', value)
+    with pytest.raises(IgnoreKey):
+        decorated({}, 'key', {'a': 'skip'})
+    assert fused({}, 'key', {'a': 'skip'}) is SKIP
+
+
+def test_compile_rule_unknown():
+    """Test that other creators are registered untouched."""
+    assert compile_rule(creator) is creator
+    decorated = dojson_utils.filter_values(creator)
+    assert compile_rule(decorated) is decorated
+    decorated = utils.for_each_value(dojson_utils.ignore_value(creator))
+    assert compile_rule(decorated) is decorated
+    assert original_creator(decorated) is decorated
+
+
+def test_overdo_over():
+    """Test that Overdo registers the fused creator."""
+    overdo = Overdo()
+
+    @overdo.over('identifiers', '^020__')
+    @utils.for_each_value
+    @utils.filter_values
+    def identifiers(self, key, value):
+        return {'value': value.get('a'), 'scheme': value.get('2')}
+
+    name, registered = overdo.rules[0][1]
+    assert registered is not identifiers
+    assert original_creator(registered) is identifiers
+    assert overdo.do({'020__': [{'a': '1'}, {'a': '2', '2': 'ISBN'}]}) == {
+        'identifiers': [{'value': '1'}, {'value': '2', 'scheme': 'ISBN'}],
+    }
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of CERN Document Server.
+# Copyright (C) 2026 CERN.
+#
+# Invenio is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License as
+# published by the Free Software Foundation; either version 2 of the
+# License, or (at your option) any later version.
+#
+# Invenio is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Invenio; if not, write to the Free Software Foundation, Inc.,
+# 59 Temple Place, Suite 330, Boston, MA 02111-1307, USA.
+"""Rule table snapshot tests."""
+
+import json
+
+import mock
+import pytest
+
+from cds_dojson import snapshot
+from cds_dojson.marc21.models.books import book
+from cds_dojson.marc21.models.videos import video
+from cds_dojson.matcher import parse_query
+from cds_dojson.pipeline import original_creator
+
+
+@pytest.fixture()
+def snapshot_file(tmp_path):
+    """Save a snapshot of the models and forget it after the test."""
+    path = str(tmp_path / 'rules.json')
+    snapshot.save(path)
+    yield path
+    snapshot.clear()
+
+
+def test_snapshot_restore(snapshot_file):
+    """Test restoring the rule tables from a file."""
+    with open(snapshot_file) as f:
+        saved = json.load(f)
+    assert snapshot.model_key(book.model) in saved['rules']
+    assert snapshot.model_key(video.model) in saved['rules']
+
+    expected_rules = list(book.model.rules)
+    assert snapshot.restore(snapshot_file)
+
+    with mock.patch('cds_dojson.snapshot.importlib_metadata.entry_points') \
+            as entry_points:
+        assert snapshot.entry_points('cds_dojson.marc21.book')
+        book.model.build()
+        assert not entry_points.called
+
+    assert [(regex, name, original_creator(creator))
+            for regex, (name, creator) in book.model.rules] == \
+        [(regex, name, original_creator(creator))
+         for regex, (name, creator) in expected_rules]
+    assert book.model.index.query('245__')[0] == 'title'
+    # The restored rules are only used once.
+    assert snapshot.restored_rules(book.model) is None
+
+
+def test_snapshot_queries(snapshot_file):
+    """Test restoring the parsed queries of the models."""
+    query = video.model.__query__
+    parse_query.cache_clear()
+    expected = parse_query(query)
+    assert snapshot.restore(snapshot_file)
+
+    parse_query.cache_clear()
+    with mock.patch('cds_dojson.matcher.pypeg2.parse') as parse:
+        assert parse_query(query) == expected
+        assert not parse.called
+    assert snapshot.restored_query(query) is None
+
+
+def test_snapshot_outdated(snapshot_file):
+    """Test that outdated snapshots are ignored."""
+    with open(snapshot_file) as f:
+        saved = json.load(f)
+
+    assert not snapshot.load(dict(saved, version='0.0.0'))
+    assert not snapshot.load(dict(saved, entry_points='changed'))
+    assert not snapshot.load(dict(saved, query_parser='0.0.0'))
+    assert not snapshot.restore(snapshot_file + '.missing')
+    assert snapshot.restored_rules(book.model) is None
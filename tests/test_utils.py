@@ -19,8 +19,10 @@
 
 from __future__ import absolute_import
 
+import copy
 import json
 import os
+import pickle
 
 import pytest
 from dojson.utils import filter_values
@@ -31,9 +33,13 @@ from cds_dojson.marc21.fields.books.utils import (
     extract_volume_number,
 )
 from cds_dojson.utils import (
+    SKIP,
     MementoDict,
     convert_date_to_iso_8601,
+    count_not_accessed_keys,
     for_each_squash,
+    for_each_value,
+    iter_not_accessed_keys,
     not_accessed_keys,
     yaml2json,
 )
@@ -57,6 +63,21 @@ def test_for_each_squash():
     assert squashed == {'a': 'foo', 'b': ['bar2', 'bar']}
 
 
+def test_skip():
+    """Check the SKIP singleton and for_each_value."""
+    assert not SKIP
+    assert copy.deepcopy(SKIP) is SKIP
+    assert pickle.loads(pickle.dumps(SKIP)) is SKIP
+
+    @for_each_value
+    def field(self, key, value):
+        return SKIP if value == 'skip' else value.upper()
+
+    assert field.__extend__
+    assert field(None, None, ['foo', 'bar']) == ['FOO', 'BAR']
+    assert field(None, None, ['foo', 'skip', 'bar']) is SKIP
+
+
 def test_convert_date_to_iso_8601():
     """Check if convert_date_to_iso_8601 works correctly"""
     string_dates = ('14/12/1989', '2013-11-22', '1999', 'Sep 1970',
@@ -124,6 +145,29 @@ def test_not_accessed_keys():
     assert not_accessed_keys(d1) == {'a', 'b1', 'c', 'd1', 'd2', 'e1'}
 
 
+def test_count_not_accessed_keys():
+    """Check the not accessed keys counted by path."""
+    d1 = MementoDict([
+        ('001', '1'),
+        ('245__', MementoDict({'a': 'Title'})),
+        ('8564_', [MementoDict({'u': 'url', 'y': 'description'}),
+                   MementoDict({'u': 'url'})]),
+    ])
+    d1.get('8564_')[0].get('u')
+
+    assert sorted(iter_not_accessed_keys(d1)) == [
+        ('001', ), ('245__', 'a'), ('8564_', 'u'), ('8564_', 'y')]
+    assert count_not_accessed_keys(d1) == {
+        ('001', ): 1, ('245__', 'a'): 1, ('8564_', 'u'): 1, ('8564_', 'y'): 1}
+
+    d1.get('8564_')[1].get('u')
+    counter = count_not_accessed_keys(d1)
+    assert count_not_accessed_keys(d1, counter) is counter
+    assert counter == {('001', ): 2, ('245__', 'a'): 2, ('8564_', 'y'): 2}
+    assert not not_accessed_keys([])
+    assert not not_accessed_keys('value')
+
+
 def test_memento_dict():
     """Check MementoDict class."""
 
@@ -140,6 +184,17 @@ def test_memento_dict():
     d = MementoDict([('a', 1), ('a', [2, 3])])
     assert d == {'a': [1, 2, 3]}
 
+    accessed_keys = MementoDict.accessed_keys
+    d = MementoDict([('a', 1), ('b', 2), ('c', 3)])
+    assert MementoDict.accessed_keys is accessed_keys
+    assert d.accessed_keys == set()
+    assert d.not_accessed_keys == {'a', 'b', 'c'}
+    d.get('a')
+    d['b']
+    assert d.accessed_keys == {'a', 'b'}
+    assert d.not_accessed_keys == {'c'}
+    assert repr(d) and d.not_accessed_keys == {'c'}
+
 
 def test_yaml2json():
     """Test yaml to json file conversion"""